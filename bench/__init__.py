@@ -0,0 +1,21 @@
+"""Lokale Cloud-Attrappe und Benchmarks für die Eberspächer Integration."""
+import importlib
+import os
+import sys
+import types
+
+PACKAGE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "custom_components",
+    "eberspaecher",
+)
+
+
+def load_integration_module(name):
+    """Lädt ein Modul der Integration ohne deren __init__.py (braucht Home Assistant)."""
+    package_name = "eberspaecher_standalone"
+    if package_name not in sys.modules:
+        package = types.ModuleType(package_name)
+        package.__path__ = [PACKAGE_DIR]
+        sys.modules[package_name] = package
+    return importlib.import_module(f"{package_name}.{name}")
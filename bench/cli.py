@@ -0,0 +1,218 @@
+"""Kommandozeilen-Client für die Eberspächer Cloud, ohne Home Assistant.
+
+Holt alle Fahrzeuge und deren Heartbeats (parallel) und gibt sie als JSON
+oder CSV aus. Mit --repeat/--interval werden mehrere Durchläufe gemessen
+und Latenz-Perzentile pro Endpoint ausgegeben, mit --profile zusätzlich
+ein cProfile-Dump des Clients.
+
+    python -m bench.cli --username me@example.com --password ... --format csv
+    python -m bench.cli --repeat 20 --interval 5 --profile cli.pstats
+"""
+import argparse
+import asyncio
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import statistics
+import sys
+import time
+
+from . import load_integration_module
+
+api_module = load_integration_module("api")
+metrics_module = load_integration_module("metrics")
+models = load_integration_module("models")
+resilience = load_integration_module("resilience")
+transport = load_integration_module("transport")
+
+VEHICLE_COLUMNS = (
+    "imei", "name", "heater_state", "temperature", "remaining_runtime",
+    "voltage", "rssi_dbm", "heartbeat_time",
+)
+LATENCY_COLUMNS = ("endpoint", "calls", "errors", "p50", "p90", "p95", "p99", "max")
+
+
+class SampleMetrics(metrics_module.ApiMetrics):
+    """ApiMetrics, die zusätzlich jede Latenz behalten (für genaue Perzentile)."""
+
+    def __init__(self):
+        super().__init__()
+        self.samples = {}
+
+    def record(self, endpoint, status, elapsed, size):
+        super().record(endpoint, status, elapsed, size)
+        self.samples.setdefault(endpoint, []).append(elapsed * 1000)
+
+    def record_error(self, endpoint, elapsed, error):
+        super().record_error(endpoint, elapsed, error)
+        self.samples.setdefault(endpoint, []).append(elapsed * 1000)
+
+
+def percentiles(samples):
+    """p50/p90/p95/p99 und Maximum in ms."""
+    if len(samples) == 1:
+        value = round(samples[0], 1)
+        return {"p50": value, "p90": value, "p95": value, "p99": value, "max": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49], 1),
+        "p90": round(cuts[89], 1),
+        "p95": round(cuts[94], 1),
+        "p99": round(cuts[98], 1),
+        "max": round(max(samples), 1),
+    }
+
+
+def latency_report(metrics, cycles_ms):
+    """Zeilen pro Endpoint plus eine Zeile für den kompletten Durchlauf."""
+    rows = []
+    for endpoint, samples in sorted(metrics.samples.items()):
+        stats = metrics.endpoints[endpoint]
+        errors = sum(stats.errors.values()) + sum(
+            count for code, count in stats.status.items() if code >= 400
+        )
+        rows.append({"endpoint": endpoint, "calls": stats.calls, "errors": errors, **percentiles(samples)})
+    if cycles_ms:
+        rows.append({"endpoint": "cycle", "calls": len(cycles_ms), "errors": 0, **percentiles(cycles_ms)})
+    return rows
+
+
+async def fetch_fleet(api, concurrency):
+    """Alle Fahrzeuge und ihre Heartbeats holen, Heartbeats parallel und begrenzt."""
+    devices = await api.get_devices()
+    vehicles = [models.Vehicle.from_json(dev) for dev in devices if dev.get("imei")]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def heartbeat(imei):
+        async with semaphore:
+            return await api.get_diagnostics(imei)
+
+    beats = await asyncio.gather(*(heartbeat(vehicle.imei) for vehicle in vehicles))
+
+    rows = []
+    for vehicle, raw in zip(vehicles, beats):
+        beat = models.Heartbeat.from_json(raw) if raw else None
+        heater = vehicle.heater
+        rows.append({
+            "imei": vehicle.imei,
+            "name": vehicle.name,
+            "heater_state": vehicle.heater_state,
+            "temperature": heater.temperature if heater else None,
+            "remaining_runtime": heater.remaining_runtime if heater else None,
+            "voltage": beat.voltage_volts if beat else None,
+            "rssi_dbm": beat.rssi_dbm if beat else None,
+            "heartbeat_time": beat.timestamp if beat else None,
+        })
+    return rows
+
+
+async def run(args):
+    ssl = False if args.insecure else None
+    session = transport.create_session(ssl)
+    try:
+        api = api_module.EberspaecherAPI(
+            args.username,
+            args.password,
+            session,
+            page_size=args.page_size,
+            base_url=args.base_url,
+            limiter=resilience.TokenBucket(args.rate_limit, args.rate_limit) if args.rate_limit else None,
+        )
+        api.metrics = SampleMetrics()
+        if not await api.login():
+            raise SystemExit("Login fehlgeschlagen")
+
+        rows = []
+        cycles_ms = []
+        for cycle in range(args.repeat):
+            if cycle:
+                await asyncio.sleep(args.interval)
+            started = time.perf_counter()
+            rows = await fetch_fleet(api, args.concurrency)
+            cycles_ms.append((time.perf_counter() - started) * 1000)
+    finally:
+        await session.close()
+
+    return rows, latency_report(api.metrics, cycles_ms) if args.repeat > 1 else None
+
+
+def write_csv(out, columns, rows):
+    writer = csv.DictWriter(out, fieldnames=columns, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def render(args, rows, latency):
+    if args.format == "json":
+        report = {"vehicles": rows}
+        if latency is not None:
+            report["latency_ms"] = latency
+        return json.dumps(report, indent=2, ensure_ascii=False)
+
+    out = io.StringIO()
+    write_csv(out, VEHICLE_COLUMNS, rows)
+    if latency is not None:
+        out.write("\n")
+        write_csv(out, LATENCY_COLUMNS, latency)
+    return out.getvalue().rstrip("\n")
+
+
+def credentials(args):
+    """Zugangsdaten aus Argumenten, Umgebung oder (wie früher) secrets.py."""
+    username = args.username or os.environ.get("EBERSPAECHER_USERNAME")
+    password = args.password or os.environ.get("EBERSPAECHER_PASSWORD")
+    if not (username and password):
+        try:
+            from secrets import MY_PASSWORD, MY_USERNAME
+        except ImportError:
+            raise SystemExit(
+                "Zugangsdaten fehlen: --username/--password, EBERSPAECHER_USERNAME/"
+                "EBERSPAECHER_PASSWORD oder secrets.py mit MY_USERNAME/MY_PASSWORD"
+            )
+        username, password = username or MY_USERNAME, password or MY_PASSWORD
+    return username, password
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--base-url", default=api_module.API_BASE_URL)
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--repeat", type=int, default=1, help="Anzahl Durchläufe")
+    parser.add_argument("--interval", type=float, default=0.0, help="Sekunden zwischen Durchläufen")
+    parser.add_argument("--concurrency", type=int, default=5, help="parallele Heartbeat-Abfragen")
+    parser.add_argument("--page-size", type=int, default=api_module.DEFAULT_PAGE_SIZE)
+    parser.add_argument(
+        "--rate-limit", type=float, default=0,
+        help="eigenes Limit in Requests/s statt dem Standard des Clients (z.B. 1000 zum Messen)",
+    )
+    parser.add_argument("--insecure", action="store_true", help="TLS-Zertifikat nicht prüfen")
+    parser.add_argument("--profile", metavar="DATEI", help="cProfile-Dump (pstats) schreiben")
+    args = parser.parse_args(argv)
+    args.username, args.password = credentials(args)
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        rows, latency = asyncio.run(run(args))
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            # Kurzfassung nach stderr, damit stdout maschinenlesbar bleibt
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(20)
+
+    print(render(args, rows, latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Lokaler Ersatz für myeberspaecher.com.
+
+Emuliert /authenticate, /calls, /calls/{imei}, /heartbeat/{imei}/latest,
+den Heartbeat-Verlauf /heartbeat/{imei} und PUT /calls/{imei}/heaters/1 mit
+einstellbarer Fahrzeugzahl, Latenz, Fehlerrate und Token-Lebensdauer.
+Zählt alle Requests pro Endpoint.
+
+Standalone: python -m bench.fake_cloud --vehicles 50 --port 8080
+"""
+import argparse
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+BASE_PATH = "/escw-application-server/rest/v1"
+
+# Heartbeat-Verlauf: so weit reicht er zurück, und so dicht ist er ohne festen Takt
+HISTORY_HOURS = 7 * 24
+HISTORY_DEFAULT_INTERVAL = 300
+
+
+class FakeCloud:
+    def __init__(
+        self, vehicles=1, latency=0.0, error_rate=0.0, token_ttl=3600, seed=None,
+        transition_delay=0.0, heartbeat_interval=0.0, clock=time.time,
+    ):
+        self.latency = latency
+        # Uhr (Epoch) für Heartbeats; der Benchmark gibt eine simulierte vor
+        self._clock = clock
+        # Sekunden im Zustand ACTIVATION_REQUESTED / DEACTIVATION_REQUESTED nach einem PUT
+        self.transition_delay = transition_delay
+        # IMEI -> (Zustand wechselt ab (monotonic), neuer Zustand)
+        self._transitions = {}
+        # Sekunden zwischen zwei neuen Heartbeats je Fahrzeug (0: bei jedem Abruf ein neuer)
+        self.heartbeat_interval = heartbeat_interval
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        # Endpoint -> Anzahl Requests
+        self.requests = Counter()
+        # Endpoint -> übertragene Bytes (Antworten)
+        self.bytes_sent = Counter()
+        self._random = random.Random(seed)
+        # Token -> gültig bis (monotonic)
+        self._tokens = {}
+        self._runner = None
+        self.vehicles = {}
+        for i in range(vehicles):
+            imei = f"86{i:013d}"
+            self.vehicles[imei] = self._make_vehicle(imei, i)
+
+    def _make_vehicle(self, imei, index):
+        """Ein Eintrag wie bei fetchHeater=FULL, inkl. Felder, die die Integration nicht liest."""
+        return {
+            "imei": imei,
+            "name": f"Fahrzeug {index + 1}",
+            "phoneNumber": f"+4917{index:08d}",
+            "firmwareVersion": "2.4.1",
+            "timezone": "Europe/Berlin",
+            "heaters": [{
+                "id": 1,
+                "heaterState": "OFF",
+                "heaterType": "AIRTRONIC",
+                "lastMeasuredTemperature": {
+                    "temperature": round(self._random.uniform(-5, 25), 1),
+                    "timestamp": _now(),
+                },
+                "currentOperation": None,
+                "timers": [
+                    {"id": t, "active": False, "weekdays": [], "startTime": "06:30"}
+                    for t in range(3)
+                ],
+            }],
+        }
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post(f"{BASE_PATH}/authenticate", self._authenticate)
+        app.router.add_get(f"{BASE_PATH}/calls", self._calls)
+        app.router.add_get(f"{BASE_PATH}/calls/{{imei}}", self._call)
+        app.router.add_get(f"{BASE_PATH}/heartbeat/{{imei}}/latest", self._heartbeat)
+        app.router.add_get(f"{BASE_PATH}/heartbeat/{{imei}}", self._heartbeat_history)
+        app.router.add_put(f"{BASE_PATH}/calls/{{imei}}/heaters/1", self._set_state)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Startet den Server und gibt die Basis-URL für EberspaecherAPI zurück."""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        return f"http://{host}:{bound_port}{BASE_PATH}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.bytes_sent.clear()
+
+    async def _simulate(self, endpoint):
+        """Zählt den Request, wartet die Latenz ab und würfelt Fehler aus."""
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise web.HTTPServiceUnavailable()
+
+    def _check_token(self, request):
+        expires = self._tokens.get(request.headers.get("escw-auth-token"))
+        if expires is None or expires < time.monotonic():
+            raise web.HTTPUnauthorized()
+
+    def _json(self, endpoint, data):
+        response = web.json_response(data)
+        self.bytes_sent[endpoint] += len(response.body)
+        return response
+
+    async def _authenticate(self, request):
+        await self._simulate("authenticate")
+        if not request.headers.get("escw-auth-email") or not request.headers.get("escw-auth-password"):
+            raise web.HTTPUnauthorized()
+        token = uuid.uuid4().hex
+        self._tokens[token] = time.monotonic() + self.token_ttl
+        return self._json("authenticate", {"token": token})
+
+    def _apply_transitions(self):
+        now = time.monotonic()
+        for imei, (due, state) in list(self._transitions.items()):
+            if due <= now:
+                self.vehicles[imei]["heaters"][0]["heaterState"] = state
+                del self._transitions[imei]
+
+    async def _call(self, request):
+        await self._simulate("calls_single")
+        self._check_token(request)
+        self._apply_transitions()
+        vehicle = self.vehicles.get(request.match_info["imei"])
+        if vehicle is None:
+            raise web.HTTPNotFound()
+        return self._json("calls_single", vehicle)
+
+    async def _calls(self, request):
+        await self._simulate("calls")
+        self._check_token(request)
+        self._apply_transitions()
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 20))
+        vehicles = list(self.vehicles.values())
+        if request.query.get("fetchHeater") == "STATUS":
+            vehicles = [_status_only(vehicle) for vehicle in vehicles]
+        total = len(vehicles)
+        return self._json("calls", {
+            "content": vehicles[page * size:(page + 1) * size],
+            "number": page,
+            "size": size,
+            "totalElements": total,
+            "totalPages": -(-total // size) if size else 0,
+        })
+
+    async def _heartbeat(self, request):
+        await self._simulate("heartbeat")
+        self._check_token(request)
+        imei = request.match_info["imei"]
+        if imei not in self.vehicles:
+            raise web.HTTPNotFound()
+        if not self.heartbeat_interval:
+            return self._json("heartbeat", {
+                "imei": imei,
+                "voltage": self._random.randint(11800, 12900),
+                "rssi": self._random.randint(5, 31),
+                "timestamp": datetime.fromtimestamp(self._clock(), timezone.utc).isoformat(),
+            })
+
+        # Jedes Fahrzeug meldet sich im eigenen Takt (versetzt), dazwischen bleibt der Wert gleich
+        interval = self.heartbeat_interval
+        return self._json("heartbeat", _sample(imei, self._slot(imei, interval), interval))
+
+    async def _heartbeat_history(self, request):
+        """Verlauf, neueste zuerst und paginiert (page/size), HISTORY_HOURS zurück."""
+        await self._simulate("heartbeat_history")
+        self._check_token(request)
+        imei = request.match_info["imei"]
+        if imei not in self.vehicles:
+            raise web.HTTPNotFound()
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 20))
+
+        interval = self.heartbeat_interval or HISTORY_DEFAULT_INTERVAL
+        newest = self._slot(imei, interval)
+        total = int(HISTORY_HOURS * 3600 // interval)
+        first = page * size
+        slots = range(newest - first, newest - min(first + size, total), -1)
+        return self._json("heartbeat_history", {
+            "content": [_sample(imei, slot, interval) for slot in slots],
+            "number": page,
+            "size": size,
+            "totalElements": total,
+            "totalPages": -(-total // size) if size else 0,
+        })
+
+    def _slot(self, imei, interval):
+        """Nummer des zuletzt gesendeten Heartbeats eines Fahrzeugs."""
+        return int((self._clock() - _phase(imei, interval)) // interval)
+
+    async def _set_state(self, request):
+        await self._simulate("set_state")
+        self._check_token(request)
+        vehicle = self.vehicles.get(request.match_info["imei"])
+        if vehicle is None:
+            raise web.HTTPNotFound()
+        payload = await request.json()
+        heater = vehicle["heaters"][0]
+        mode = payload.get("operationMode", "OFF")
+        if self.transition_delay:
+            heater["heaterState"] = "DEACTIVATION_REQUESTED" if mode == "OFF" else "ACTIVATION_REQUESTED"
+            self._transitions[vehicle["imei"]] = (time.monotonic() + self.transition_delay, mode)
+        else:
+            heater["heaterState"] = mode
+        heater["currentOperation"] = None if mode == "OFF" else {
+            "operationMode": mode,
+            "runtime": payload.get("runtime"),
+            "remainingRuntime": payload.get("runtime"),
+        }
+        return web.Response(status=204)
+
+
+def _status_only(vehicle):
+    """Schlanke Projektion: nur, was für das laufende Polling gebraucht wird."""
+    heater = vehicle["heaters"][0]
+    return {
+        "imei": vehicle["imei"],
+        "name": vehicle["name"],
+        "heaters": [{
+            key: heater[key]
+            for key in ("id", "heaterState", "lastMeasuredTemperature", "currentOperation")
+        }],
+    }
+
+
+def _phase(imei, interval):
+    """Versatz des Fahrzeugs innerhalb des Takts, damit nicht alle gleichzeitig senden."""
+    return int(imei) % 997 / 997 * interval
+
+
+def _sample(imei, slot, interval):
+    """Heartbeat Nummer `slot`: gleiche Nummer, gleiche Werte."""
+    sample = random.Random(f"{imei}-{slot}")
+    sent = _phase(imei, interval) + slot * interval
+    return {
+        "imei": imei,
+        "voltage": sample.randint(11800, 12900),
+        "rssi": sample.randint(5, 31),
+        "timestamp": datetime.fromtimestamp(sent, timezone.utc).isoformat(),
+    }
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def _serve(args):
+    cloud = FakeCloud(
+        args.vehicles, args.latency, args.error_rate, args.token_ttl, args.seed,
+        args.transition_delay, args.heartbeat_interval,
+    )
+    base_url = await cloud.start(args.host, args.port)
+    print(f"Fake-Cloud mit {args.vehicles} Fahrzeugen läuft: {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await cloud.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--vehicles", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="Sekunden pro Request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil 503-Antworten (0-1)")
+    parser.add_argument("--token-ttl", type=float, default=3600, help="Token-Lebensdauer in Sekunden")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--heartbeat-interval", type=float, default=0.0,
+        help="Sekunden zwischen neuen Heartbeats je Fahrzeug (0: bei jedem Abruf ein neuer)",
+    )
+    parser.add_argument(
+        "--transition-delay", type=float, default=0.0,
+        help="Sekunden bis ein Schaltbefehl vom *_REQUESTED-Zustand in den Zielzustand wechselt",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Skalierungs-Benchmark der Eberspächer Integration gegen die lokale Fake-Cloud.
+
+Treibt pro Flottengröße die echten Coordinators (EberspaecherCoordinator und
+EberspaecherHeartbeatCoordinator) in einer schlanken Home-Assistant-Instanz
+über eine simulierte Dauer: Jeder Coordinator läuft wieder, wenn sein
+eigenes update_interval abgelaufen ist, so wie HA ihn planen würde. Damit
+stecken adaptives Polling, schlanke/FULL-Projektion und der gelernte
+Heartbeat-Takt in den Zahlen. Die Zeit läuft virtuell (Coordinator und
+Fake-Cloud bekommen dieselbe vorgestellte Uhr), Requests laufen echt über HTTP.
+
+Gemessen: Requests und Bytes pro simulierter Stunde, Requests pro Zyklus
+der beiden Coordinators, Dauer pro Refresh, geänderte Felder (was die Entitäten schreiben würden), Event-Loop-Lag und
+Speicher.
+
+Nicht abgebildet: Entitäten und State-Writes selbst, Schaltbefehle samt
+Bestätigung, der Timer zum Ende der Restlaufzeit, der stündliche Import des
+Heartbeat-Verlaufs (braucht den Recorder) und HA's Jitter beim Planen.
+
+Braucht Home Assistant (z.B. über pytest-homeassistant-custom-component).
+
+    python -m bench.run_bench --sizes 1,10,100,500 --hours 6 --heartbeat-interval 300
+"""
+import argparse
+import asyncio
+from collections import Counter
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from .fake_cloud import FakeCloud
+
+try:
+    from homeassistant.core import HomeAssistant
+except ImportError:
+    raise SystemExit("bench.run_bench braucht Home Assistant (pip install homeassistant)")
+
+from custom_components.eberspaecher import api as api_module
+from custom_components.eberspaecher import coordinator as coordinator_module
+from custom_components.eberspaecher import resilience, transport
+
+
+class VirtualClock:
+    """Wanduhr plus simulierter Vorlauf; ersetzt `time` im Coordinator-Modul."""
+
+    def __init__(self):
+        self._start = time.time()
+        self._offset = 0.0
+
+    def advance_to(self, seconds):
+        """Uhr auf `seconds` nach dem Start stellen (nur vorwärts)."""
+        self._offset = max(self._offset, self._start + seconds - time.time())
+
+    def time(self):
+        return time.time() + self._offset
+
+    def monotonic(self):
+        return time.monotonic() + self._offset
+
+
+class LoopLagMonitor:
+    """Misst, wie viel später als geplant ein kurzer Sleep zurückkommt."""
+
+    def __init__(self, interval=0.01):
+        self._interval = interval
+        self._task = None
+        self.samples = []
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self._interval)
+            self.samples.append(loop.time() - start - self._interval)
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def simulate(clock, cloud, coordinators, hours):
+    """Coordinators nach ihrem update_interval laufen lassen, bis `hours` simuliert sind.
+
+    Gibt pro Coordinator die Dauer der Refreshes (s), die Anzahl geänderter
+    Felder und die Requests pro Endpoint zurück, dazu die Bytes pro Endpoint. Die Zähler der Fake-Cloud
+    werden nach jedem Refresh zurückgesetzt, damit jeder Request dem
+    Coordinator zugeordnet wird, der ihn ausgelöst hat.
+    """
+    end = hours * 3600
+    next_run = {name: 0.0 for name in coordinators}
+    wall_times = {name: [] for name in coordinators}
+    changed = {name: 0 for name in coordinators}
+    requests = {name: Counter() for name in coordinators}
+    bytes_sent = Counter()
+    cloud.reset_counters()
+    while True:
+        # Bei Gleichstand zuerst /calls, der Heartbeat-Coordinator liest dessen Snapshot
+        name = min(next_run, key=next_run.get)
+        if next_run[name] >= end:
+            break
+        clock.advance_to(next_run[name])
+        coordinator = coordinators[name]
+        started = time.perf_counter()
+        await coordinator.async_refresh()
+        wall_times[name].append(time.perf_counter() - started)
+        changed[name] += sum(map(len, coordinator.changes.values()))
+        requests[name].update(cloud.requests)
+        bytes_sent.update(cloud.bytes_sent)
+        cloud.reset_counters()
+        next_run[name] += coordinator.update_interval.total_seconds()
+    return wall_times, changed, requests, bytes_sent
+
+
+async def bench_size(size, args):
+    clock = VirtualClock()
+    coordinator_module.time = clock
+    if args.full:
+        coordinator_module.FULL_REFRESH_INTERVAL_SECONDS = 0
+
+    cloud = FakeCloud(
+        size, args.latency, args.error_rate, args.token_ttl, seed=size,
+        heartbeat_interval=args.heartbeat_interval, clock=clock.time,
+    )
+    for vehicle in list(cloud.vehicles.values())[:args.active]:
+        heater = vehicle["heaters"][0]
+        heater["heaterState"] = "HEATING"
+        heater["currentOperation"] = {"operationMode": "HEATING", "runtime": 120, "remainingRuntime": 120}
+    base_url = await cloud.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        session = transport.create_session()
+        try:
+            api = api_module.EberspaecherAPI(
+                "bench@example.com",
+                "bench",
+                session,
+                base_url=base_url,
+                page_size=args.page_size,
+                limiter=resilience.TokenBucket(args.rate_limit, args.rate_limit),
+            )
+            devices = coordinator_module.EberspaecherCoordinator(hass, api)
+            heartbeat = coordinator_module.EberspaecherHeartbeatCoordinator(
+                hass, api, devices, args.concurrency
+            )
+            coordinators = {"calls": devices, "heartbeat": heartbeat}
+
+            monitor = LoopLagMonitor()
+            tracemalloc.start()
+            monitor.start()
+            wall_times, changed, requests, bytes_sent = await simulate(clock, cloud, coordinators, args.hours)
+            await monitor.stop()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            await devices.async_shutdown()
+            await heartbeat.async_shutdown()
+        finally:
+            await session.close()
+            await cloud.stop()
+            await hass.async_stop(force=True)
+
+    refreshes = [seconds for times in wall_times.values() for seconds in times]
+    by_endpoint = sum(requests.values(), Counter())
+    return {
+        "vehicles": size,
+        "found": len(devices.data or {}),
+        "requests_per_hour": sum(by_endpoint.values()) / args.hours,
+        "requests_by_endpoint": {
+            endpoint: count / args.hours for endpoint, count in sorted(by_endpoint.items())
+        },
+        # Ein Zyklus = ein Refresh des jeweiligen Coordinators
+        "requests_per_cycle": {
+            name: sum(requests[name].values()) / max(len(times), 1)
+            for name, times in wall_times.items()
+        },
+        "bytes_per_hour": sum(bytes_sent.values()) / args.hours,
+        "refreshes": {name: len(times) for name, times in wall_times.items()},
+        "changes_per_hour": sum(changed.values()) / args.hours,
+        "wall_ms_mean": statistics.mean(refreshes) * 1000,
+        "wall_ms_max": max(refreshes) * 1000,
+        "loop_lag_ms_max": max(monitor.samples, default=0) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+async def run(args):
+    results = []
+    for size in args.sizes:
+        results.append(await bench_size(size, args))
+    return results
+
+
+def print_table(results):
+    header = (
+        f"{'Fahrzeuge':>9} {'gefunden':>8} {'Req/h':>8} {'/calls':>7} {'Heartb.':>8} "
+        f"{'Req/Zyk. /calls':>15} {'Heartb.':>8} {'KiB/h':>9} {'Änd./h':>8} {'Zeit ms':>9} {'max ms':>8} {'Lag ms':>7} {'Peak KiB':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        by_endpoint = r["requests_by_endpoint"]
+        per_cycle = r["requests_per_cycle"]
+        print(
+            f"{r['vehicles']:>9} {r['found']:>8} {r['requests_per_hour']:>8.1f} "
+            f"{by_endpoint.get('calls', 0):>7.1f} {by_endpoint.get('heartbeat', 0):>8.1f} "
+            f"{per_cycle['calls']:>15.2f} {per_cycle['heartbeat']:>8.2f} "
+            f"{r['bytes_per_hour'] / 1024:>9.1f} {r['changes_per_hour']:>8.1f} "
+            f"{r['wall_ms_mean']:>9.1f} {r['wall_ms_max']:>8.1f} "
+            f"{r['loop_lag_ms_max']:>7.2f} {r['peak_kib']:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,50,100,250,500",
+                        type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--hours", type=float, default=2, help="simulierte Dauer pro Flottengröße")
+    parser.add_argument("--heartbeat-interval", type=float, default=300,
+                        help="Sekunden zwischen neuen Heartbeats je Fahrzeug (0: bei jedem Abruf ein neuer)")
+    parser.add_argument("--active", type=int, default=0, help="so viele Heizungen laufen während der Messung")
+    parser.add_argument("--full", action="store_true",
+                        help="jeden Zyklus mit fetchHeater=FULL statt der schlanken Projektion pollen")
+    parser.add_argument("--latency", type=float, default=0.05, help="Sekunden pro Request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=float, default=3600)
+    parser.add_argument("--concurrency", type=int, default=5, help="parallele Heartbeats")
+    parser.add_argument("--page-size", type=int, default=api_module.DEFAULT_PAGE_SIZE)
+    parser.add_argument("--rate-limit", type=float, default=1000,
+                        help="Requests pro Sekunde (Standard in HA: %d)" % api_module.RATE_LIMIT_PER_SECOND)
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,154 @@
+import time
+from datetime import timedelta
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from .const import DOMAIN, DEFAULT_RUNTIME, MODE_HEATING
-from .api import EberspaecherAPI
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+import homeassistant.helpers.config_validation as cv
+from .const import (
+    DOMAIN,
+    DEFAULT_RUNTIME,
+    MODE_HEATING,
+    CONF_HEARTBEAT_CONCURRENCY,
+    CONF_HEDGE_REQUESTS,
+    CONF_PAGE_SIZE,
+    CONF_TOKEN,
+    DEFAULT_HEARTBEAT_CONCURRENCY,
+    HISTORY_IMPORT_INTERVAL_HOURS,
+    TREND_WINDOW_SAMPLES,
+)
+from .api import DEFAULT_PAGE_SIZE
+from .commands import CommandQueue
+from .models import Heartbeat, Vehicle
+from .coordinator import EberspaecherCoordinator, EberspaecherHeartbeatCoordinator
+from .fleet import FleetAggregates
+from .history import HeartbeatHistoryImporter
+from .registry import async_get_registry
+from .services import async_setup_services
+from .storage import EberspaecherStorage
+from .trends import VehicleTrends
 
 # Diese Plattformen laden wir (Schalter, Auswahl, Nummernfeld, Sensoren)
 PLATFORMS = ["switch", "select", "number", "sensor"]
 
+# Nur über die UI einzurichten, keine YAML-Konfiguration
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config) -> bool:
+    """Services einmalig für alle Konten registrieren."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Setup der Integration."""
     hass.data.setdefault(DOMAIN, {})
 
-    session = async_get_clientsession(hass)
-    api = EberspaecherAPI(entry.data["username"], entry.data["password"], session)
+    # Gespeichertes Token wiederverwenden statt bei jedem Start neu einzuloggen
+    storage = EberspaecherStorage(hass, entry.entry_id)
+    await storage.async_load()
+
+    # Ein Client pro Konto für alle Einträge und über Reloads hinweg,
+    # mit gemeinsamer Session und gemeinsamem Request-Budget
+    registry = async_get_registry(hass)
+    api = registry.async_acquire(
+        entry.data["username"],
+        entry.data["password"],
+        token=storage.token or entry.data.get(CONF_TOKEN),
+        on_token=storage.async_set_token,
+        page_size=entry.options.get(CONF_PAGE_SIZE, DEFAULT_PAGE_SIZE),
+        hedge=entry.options.get(CONF_HEDGE_REQUESTS, False),
+    )
+    # Über on_unload, damit auch ein fehlgeschlagenes Setup (ConfigEntryNotReady) freigibt
+    entry.async_on_unload(lambda: registry.async_release(entry.data["username"]))
+
+    # Ein Coordinator pro Konto: /calls wird nur einmal pro Intervall geholt
+    coordinator = EberspaecherCoordinator(hass, api)
+    entry.async_on_unload(coordinator.async_shutdown)
+
+    # Heartbeat (Spannung, RSSI) einmal pro Fahrzeug und Zyklus für alle Sensoren
+    heartbeat = EberspaecherHeartbeatCoordinator(
+        hass,
+        api,
+        coordinator,
+        entry.options.get(CONF_HEARTBEAT_CONCURRENCY, DEFAULT_HEARTBEAT_CONCURRENCY),
+    )
+    entry.async_on_unload(heartbeat.async_shutdown)
 
-    # Wir speichern API und Einstellungen in einem Dictionary
+    devices = storage.snapshot("devices")
+    if devices:
+        # Schnellstart: Entitäten sofort aus dem letzten Snapshot anlegen
+        # (als "restored" markiert), Live-Daten kommen im Hintergrund
+        coordinator.async_restore(
+            {imei: Vehicle.from_json(raw) for imei, raw in devices.items()}
+        )
+        heartbeat.async_restore({
+            imei: Heartbeat.from_json(raw)
+            for imei, raw in (storage.snapshot("heartbeats") or {}).items()
+        })
+        entry.async_create_background_task(
+            hass, _async_refresh_live(coordinator, heartbeat), f"{DOMAIN}_refresh_live"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+        await heartbeat.async_refresh()
+        _store_snapshot(storage, "devices", coordinator)
+        _store_snapshot(storage, "heartbeats", heartbeat)
+
+    # Jeden guten Stand für den nächsten Start merken
+    entry.async_on_unload(
+        coordinator.async_add_listener(
+            lambda: _store_snapshot(storage, "devices", coordinator)
+        )
+    )
+    entry.async_on_unload(
+        heartbeat.async_add_listener(
+            lambda: _store_snapshot(storage, "heartbeats", heartbeat)
+        )
+    )
+
+    # Flotten-Kennzahlen: erst komplett, danach nur noch die geänderten Fahrzeuge
+    fleet = FleetAggregates()
+    _update_fleet(fleet, coordinator, heartbeat, coordinator.data or {})
+    entry.async_on_unload(
+        coordinator.async_add_listener(
+            lambda: _update_fleet(fleet, coordinator, heartbeat, coordinator.changes)
+        )
+    )
+    entry.async_on_unload(
+        heartbeat.async_add_listener(
+            lambda: fleet.update_heartbeats(heartbeat.data or {}, heartbeat.changes)
+        )
+    )
+
+    # Spannung und Temperatur pro Fahrzeug im Ringpuffer mitschreiben (für Trend-Sensoren)
+    trends = {}
+    entry.async_on_unload(
+        coordinator.async_add_listener(lambda: _record_temperatures(trends, coordinator))
+    )
+    entry.async_on_unload(
+        heartbeat.async_add_listener(lambda: _record_voltages(trends, heartbeat))
+    )
+
+    # Heartbeat-Verlauf stündlich als Langzeitstatistik nachladen
+    history = HeartbeatHistoryImporter(hass, api, coordinator)
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, history.async_import, timedelta(hours=HISTORY_IMPORT_INTERVAL_HOURS)
+        )
+    )
+    entry.async_create_background_task(hass, history.async_import(), f"{DOMAIN}_history_import")
+
+    # Wir speichern API, Coordinator und Einstellungen in einem Dictionary
     hass.data[DOMAIN][entry.entry_id] = {
         "api": api,
+        "coordinator": coordinator,
+        "heartbeat": heartbeat,
+        "commands": CommandQueue(api),
+        "storage": storage,
+        "trends": trends,
+        "fleet": fleet,
         "settings": {
             "mode": MODE_HEATING,      # Standard: Heizen
             "runtime": DEFAULT_RUNTIME # Standard: 30 Min
@@ -26,11 +158,86 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Lade alle Plattformen
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Geänderte Optionen greifen nach einem Reload
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
+
+async def _async_refresh_live(coordinator, heartbeat):
+    """Live-Daten nach einem Schnellstart aus dem Snapshot holen."""
+    await coordinator.async_refresh()
+    await heartbeat.async_refresh()
+
+
+@callback
+def _store_snapshot(storage, key, coordinator):
+    """Nur erfolgreiche Updates mit echten Änderungen speichern."""
+    if coordinator.last_update_success and coordinator.changes:
+        storage.async_set_snapshot(
+            key, {imei: model.to_json() for imei, model in coordinator.data.items()}
+        )
+
+
+@callback
+def _update_fleet(fleet, coordinator, heartbeat, imeis):
+    """Geänderte Fahrzeuge übernehmen; neue bekommen gleich ihren Heartbeat mit."""
+    added = fleet.update_vehicles(coordinator.data or {}, imeis)
+    if added:
+        fleet.update_heartbeats(heartbeat.data or {}, added)
+
+
+@callback
+def _record_temperatures(trends, coordinator):
+    """Nach jedem erfolgreichen /calls Abruf die Temperatur jedes Fahrzeugs übernehmen.
+
+    Bestätigungen nach einem Schaltbefehl ersetzen nur ein Fahrzeug; die
+    übrigen behalten ihr Heater-Objekt und werden nicht erneut eingetragen.
+    """
+    if not coordinator.last_update_success or coordinator.restored:
+        return
+    now = time.time()
+    for imei, vehicle in coordinator.data.items():
+        if vehicle.heater is not None:
+            _trends_for(trends, imei).add_temperature(now, vehicle.heater)
+
+
+@callback
+def _record_voltages(trends, heartbeat):
+    """Neue Heartbeats (nach Zeitstempel) in den Spannungsverlauf übernehmen."""
+    if not heartbeat.last_update_success or heartbeat.restored:
+        return
+    now = time.time()
+    for imei, beat in heartbeat.data.items():
+        volts = beat.voltage_volts
+        if volts is None:
+            continue
+        beat_time = beat.time
+        _trends_for(trends, imei).add_voltage(
+            beat_time.timestamp() if beat_time else now, volts, beat.timestamp
+        )
+
+
+def _trends_for(trends, imei):
+    if imei not in trends:
+        trends[imei] = VehicleTrends(TREND_WINDOW_SAMPLES)
+    return trends[imei]
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Neu laden, wenn sich die Optionen geändert haben."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Entfernen der Integration."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
-    return unload_ok
\ No newline at end of file
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        await data["commands"].async_shutdown()
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Gespeichertes Token beim Löschen der Integration mit entfernen."""
+    await EberspaecherStorage(hass, entry.entry_id).async_remove()
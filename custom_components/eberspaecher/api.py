@@ -1,96 +1,546 @@
+import asyncio
 import logging
+import time
 import aiohttp
-import json
+
+from .metrics import ApiMetrics
+from .models import parse_timestamp
+from .resilience import CircuitBreaker, TokenBucket, backoff_delay
+from .transport import json_loads
 
 _LOGGER = logging.getLogger(__name__)
 
 API_BASE_URL = "https://myeberspaecher.com/escw-application-server/rest/v1"
 
+# Statuscodes, bei denen das Token abgelaufen/ungültig ist
+AUTH_ERROR_STATUS = (401, 403)
+
+# /calls ist paginiert: Geräte pro Seite und max. parallel geladene Seiten
+DEFAULT_PAGE_SIZE = 25
+MAX_PARALLEL_PAGES = 4
+
+# fetchHeater-Projektionen von /calls: FULL (Timer, Firmware, ...) für Setup und
+# Erkennung neuer Fahrzeuge, die schlanke Variante für das laufende Polling
+FETCH_HEATER_FULL = "FULL"
+FETCH_HEATER_LEAN = "STATUS"
+# Antworten, mit denen die Cloud die schlanke Projektion eindeutig ablehnt
+LEAN_REJECTED_STATUS = (400, 404, 422)
+
+# Heartbeat-Verlauf: Einträge pro Seite und max. Seiten pro Abruf
+HISTORY_PAGE_SIZE = 200
+HISTORY_MAX_PAGES = 20
+
+# Client-seitiges Rate Limit für alle Requests (Token-Bucket)
+RATE_LIMIT_PER_SECOND = 5
+RATE_LIMIT_BURST = 10
+
+# Wiederholung bei Netzwerkfehlern, 429 und 5xx mit exponentiellem Backoff
+MAX_RETRIES = 2
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 10
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+
+# Frist pro Endpoint in Sekunden (inkl. Verbindungsaufbau), danach wird der
+# Request abgebrochen und wie ein Netzwerkfehler behandelt
+ENDPOINT_TIMEOUTS = {
+    "authenticate": 15,
+    "calls": 15,
+    "calls_single": 10,
+    "heartbeat": 10,
+    "heartbeat_history": 30,
+    "set_state": 20,
+}
+DEFAULT_ENDPOINT_TIMEOUT = 20
+
+# Hedging: idempotente GETs ein zweites Mal senden, wenn die erste Antwort
+# länger als das p95 des Endpoints braucht (erst ab genug Messwerten)
+HEDGED_ENDPOINTS = ("calls", "calls_single", "heartbeat")
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY_SECONDS = 0.05
+
+# Circuit Breaker: nach so vielen Fehlern in Folge für eine Weile sofort abbrechen
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 60
+
+
+class EberspaecherAPIError(Exception):
+    """Fehler beim Abruf von der Eberspächer Cloud."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        # HTTP-Status der fehlgeschlagenen Antwort (None ohne Antwort oder Login)
+        self.status = status
+
+
+class EberspaecherCircuitOpenError(EberspaecherAPIError):
+    """Die Cloud ist gerade gestört; Requests werden sofort abgelehnt."""
+
 
 class EberspaecherAPI:
-    def __init__(self, username, password, session: aiohttp.ClientSession):
+    def __init__(
+        self,
+        username,
+        password,
+        session: aiohttp.ClientSession,
+        cache_ttl=0,
+        token=None,
+        on_token=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        base_url=API_BASE_URL,
+        limiter=None,
+        timeouts=None,
+        hedge=False,
+    ):
         self._username = username
         self._password = password
         self._session = session
-        self._token = None
+        self._base_url = base_url
+        # Token kann aus dem Speicher bzw. dem Config Flow übernommen werden
+        self._token = token
+        # Callback(token), damit Home Assistant neue Tokens speichern kann
+        self._on_token = on_token
+        # Nur ein /authenticate gleichzeitig
+        self._login_lock = asyncio.Lock()
+        self._page_size = page_size
+        self._page_semaphore = asyncio.Semaphore(MAX_PARALLEL_PAGES)
+        # Eigener Rate Limiter oder ein von außen vorgegebener (z.B. im Benchmark)
+        self._limiter = limiter or TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+        self._breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET_SECONDS)
+        # Frist pro Endpoint, einmal als ClientTimeout gebaut
+        self._timeouts = {
+            endpoint: aiohttp.ClientTimeout(total=seconds)
+            for endpoint, seconds in {**ENDPOINT_TIMEOUTS, **(timeouts or {})}.items()
+        }
+        self._default_timeout = aiohttp.ClientTimeout(total=DEFAULT_ENDPOINT_TIMEOUT)
+        self._hedge = hedge
+        # Anzahl, Latenz, Statuscodes und Bytes pro Endpoint (für Diagnostics)
+        self.metrics = ApiMetrics()
+        # Single-Flight: laufende Reads pro Schlüssel (z.B. ("devices", "FULL"))
+        self._inflight = {}
+        # Optionaler Kurzzeit-Cache: Schlüssel -> (gültig bis, Ergebnis)
+        self._cache_ttl = cache_ttl
+        # Schlanke Projektion; wird abgeschaltet, wenn die Cloud sie nicht unterstützt
+        self._lean_supported = True
+        # Einzelabruf /calls/{imei}; wird abgeschaltet, wenn die Cloud ihn nicht kennt
+        self._single_device_supported = True
+        # Heartbeat-Verlauf /heartbeat/{imei}; wird abgeschaltet, wenn die Cloud ihn nicht kennt
+        self._history_supported = True
+        # Fahrzeuge, für die /heartbeat/{imei} 404 liefert (nur diese werden übersprungen)
+        self._history_unsupported = set()
+        self._cache = {}
         self._headers = {
             "Accept": "application/json, text/plain, */*",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Content-Type": "application/json"
         }
+        # Header werden einmal gebaut (Login) bzw. einmal pro Token, nicht pro Request
+        self._login_headers = {
+            key: value for key, value in self._headers.items() if key != "Content-Type"
+        }
+        self._login_headers["escw-auth-email"] = self._username
+        self._login_headers["escw-auth-password"] = self._password
+        self._auth_headers = self._build_auth_headers(token)
+
+    async def _coalesce(self, key, fetch, cacheable=True):
+        """Fasst identische, gleichzeitige Reads zu einem HTTP-Request zusammen.
+
+        Wer während eines laufenden Requests kommt, bekommt dessen Ergebnis.
+        Mit cache_ttl > 0 werden Ergebnisse danach noch kurz wiederverwendet.
+        """
+        if cacheable and self._cache_ttl:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            async def run():
+                try:
+                    result = await fetch()
+                finally:
+                    self._inflight.pop(key, None)
+                # Nur erfolgreiche Ergebnisse cachen
+                if cacheable and self._cache_ttl and result:
+                    self._cache[key] = (time.monotonic() + self._cache_ttl, result)
+                return result
+
+            task = asyncio.ensure_future(run())
+            self._inflight[key] = task
+
+        # shield: Abbruch eines Aufrufers bricht nicht den geteilten Request ab
+        return await asyncio.shield(task)
+
+    def configure(self, on_token=None, page_size=None, hedge=None):
+        """Callback, Seitengröße und Hedging neu setzen, wenn der Client wiederverwendet wird."""
+        self._on_token = on_token
+        if page_size is not None:
+            self._page_size = page_size
+        if hedge is not None:
+            self._hedge = hedge
+
+    @property
+    def token(self):
+        """Aktuelles Auth-Token (None, wenn nicht eingeloggt)."""
+        return self._token
 
     async def login(self):
-        """Loggt sich per Header-Auth ein."""
-        url = f"{API_BASE_URL}/authenticate"
-        auth_headers = self._headers.copy()
-        auth_headers["escw-auth-email"] = self._username
-        auth_headers["escw-auth-password"] = self._password
+        """Loggt sich per Header-Auth ein (parallele Aufrufe teilen sich einen Login)."""
+        return await self._coalesce(("login",), self._login, cacheable=False)
 
-        if "Content-Type" in auth_headers:
-            del auth_headers["Content-Type"]
+    async def _login(self):
+        async with self._login_lock:
+            return await self._authenticate()
+
+    async def _authenticate(self):
+        """POST /authenticate. Nur unter self._login_lock aufrufen."""
+        url = f"{self._base_url}/authenticate"
 
         try:
-            async with self._session.post(url, headers=auth_headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    self._token = data.get("token")
-                    return True
-                _LOGGER.error(f"Login fehlgeschlagen: {response.status}")
-                return False
+            await self._limiter.acquire()
+            status, body = await self._send("authenticate", "POST", url, headers=self._login_headers)
+            if status == 200:
+                data = json_loads(body)
+                self._set_token(data.get("token"))
+                return self._token is not None
+            _LOGGER.error(f"Login fehlgeschlagen: {status}")
+            return False
         except Exception as e:
             _LOGGER.error(f"Verbindungsfehler Login: {e}")
             return False
 
-    async def get_devices(self):
-        """Holt die Geräteliste."""
-        if not self._token:
-            if not await self.login():
-                return []
+    def _build_auth_headers(self, token):
+        headers = dict(self._headers)
+        headers["escw-auth-token"] = token
+        return headers
+
+    def _set_token(self, token):
+        self._token = token
+        self._auth_headers = self._build_auth_headers(token)
+        if self._on_token is not None:
+            self._on_token(token)
+
+    async def _ensure_token(self):
+        """Loggt sich ein, falls noch kein Token vorhanden ist."""
+        if self._token:
+            return True
+        async with self._login_lock:
+            # Wer auf den Lock gewartet hat, nutzt das Token des ersten Logins
+            if self._token:
+                return True
+            return await self._authenticate()
+
+    async def _refresh_token(self, stale_token):
+        """Neuer Login nach 401/403, aber nur einmal für alle wartenden Requests."""
+        async with self._login_lock:
+            if self._token and self._token != stale_token:
+                # Ein anderer Request hat schon neu eingeloggt
+                return True
+            _LOGGER.debug("Token abgelaufen, logge neu ein")
+            self.metrics.relogins += 1
+            self._token = None
+            return await self._authenticate()
+
+    @property
+    def circuit_state(self):
+        """Zustand des Circuit Breakers (closed, open, half_open)."""
+        return self._breaker.state
+
+    async def _request(self, endpoint, method, url, **kwargs):
+        """Request mit Rate Limit, Backoff und Circuit Breaker.
+
+        Gibt (Status, Antwort) zurück: JSON bei 200, sonst den Text.
+        Ohne gültigen Login: (None, None). Wirft EberspaecherCircuitOpenError,
+        solange der Circuit Breaker offen ist.
+        """
+        probe = self._breaker.state == CircuitBreaker.HALF_OPEN
+        if not self._breaker.allow_request():
+            raise EberspaecherCircuitOpenError("Eberspächer Cloud gestört, Request übersprungen")
+
+        for attempt in range(MAX_RETRIES + 1):
+            error = None
+            try:
+                status, data = await self._authorized_request(endpoint, method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, data, error = None, None, e
+            except asyncio.CancelledError:
+                # Abgebrochener Probe-Request (Entladen, Hedge, Frist) darf den Breaker nicht sperren
+                if probe:
+                    self._breaker.release_probe()
+                raise
+            except Exception:
+                # z.B. HTML-Wartungsseite mit Status 200 statt JSON
+                self._breaker.record_failure()
+                raise
+            else:
+                if status is None:
+                    # Login fehlgeschlagen, nicht wiederholen
+                    self._breaker.record_failure()
+                    return None, None
+                if status not in TRANSIENT_STATUS:
+                    self._breaker.record_success()
+                    return status, data
+
+            self._breaker.record_failure()
+            probe = self._breaker.state == CircuitBreaker.HALF_OPEN
+            if attempt == MAX_RETRIES or not self._breaker.allow_request():
+                break
+            delay = backoff_delay(attempt, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS)
+            _LOGGER.debug(f"{method} {url} fehlgeschlagen ({status or error}), neuer Versuch in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        if error is not None:
+            raise error
+        return status, data
+
+    async def _authorized_request(self, endpoint, method, url, **kwargs):
+        """Request mit Token. Bei 401/403 einmal neu einloggen und wiederholen."""
+        if not await self._ensure_token():
+            return None, None
+
+        for attempt in range(2):
+            token = self._token
+            headers = self._auth_headers
 
-        url = f"{API_BASE_URL}/calls"
-        params = {"fetchHeater": "FULL", "email": "CURRENT", "page": "0", "size": "5"}
+            await self._limiter.acquire()
+            status, body = await self._send(endpoint, method, url, headers=headers, **kwargs)
+            if status in AUTH_ERROR_STATUS and attempt == 0:
+                if not await self._refresh_token(token):
+                    return status, None
+                continue
+            if status == 200:
+                return status, json_loads(body) if body else None
+            return status, body.decode(errors="replace")
 
-        headers = self._headers.copy()
-        headers["escw-auth-token"] = self._token
+    async def _send(self, endpoint, method, url, **kwargs):
+        """Ein HTTP-Request mit Frist; GETs ggf. gehedgt. Gibt (Status, Body) zurück."""
+        kwargs.setdefault("timeout", self._timeouts.get(endpoint, self._default_timeout))
+        delay = self._hedge_delay(endpoint) if method == "GET" else None
+        if delay is None:
+            return await self._send_once(endpoint, method, url, **kwargs)
 
+        first = asyncio.ensure_future(self._send_once(endpoint, method, url, **kwargs))
+        pending = {first}
         try:
-            async with self._session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get("content", [])
-                return []
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                # Erste Antwort überfällig: zweiten Request starten, der schnellere gewinnt
+                await self._limiter.acquire()
+                if first.done():
+                    return first.result()
+                self.metrics.hedged += 1
+                pending.add(asyncio.ensure_future(self._send_once(endpoint, method, url, **kwargs)))
+                error = None
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    # Alle Ergebnisse abholen, auch die Fehler des Verlierers
+                    outcomes = [(task.exception(), task) for task in done]
+                    for exception, task in outcomes:
+                        if exception is None:
+                            return task.result()
+                        error = exception
+                raise error
+            return first.result()
+        finally:
+            # Verlierer (und bei Abbruch des Aufrufers alle) sauber abbrechen
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self, endpoint):
+        """Wartezeit bis zum zweiten Request (p95 in s) oder None, wenn nicht gehedgt wird."""
+        if not self._hedge or endpoint not in HEDGED_ENDPOINTS:
+            return None
+        stats = self.metrics.endpoints.get(endpoint)
+        if stats is None or stats.calls < HEDGE_MIN_SAMPLES:
+            return None
+        return max(stats.percentile(0.95) / 1000, HEDGE_MIN_DELAY_SECONDS)
+
+    async def _send_once(self, endpoint, method, url, **kwargs):
+        """Ein HTTP-Request; misst Latenz, Status und Bytes. Gibt (Status, Body) zurück."""
+        started = time.monotonic()
+        try:
+            async with self._session.request(method, url, **kwargs) as response:
+                body = await response.read()
+        except Exception as e:
+            self.metrics.record_error(endpoint, time.monotonic() - started, e)
+            raise
+        self.metrics.record(endpoint, response.status, time.monotonic() - started, len(body))
+        return response.status, body
+
+    async def get_devices(self, full=True):
+        """Holt die Geräteliste (alle Seiten). [] bei Fehlern, wirft bei offenem Breaker.
+
+        full=False nutzt die schlanke Projektion (nur Status, Temperatur und
+        laufender Betrieb). Lehnt die Cloud sie ab (400/404/422 oder Antwort
+        ohne heaterState), wird ab dann FULL geholt.
+        """
+        projection = FETCH_HEATER_FULL if full or not self._lean_supported else FETCH_HEATER_LEAN
+        return await self._coalesce(("devices", projection), lambda: self._get_devices(projection))
+
+    async def _get_devices(self, projection):
+        try:
+            devices = [device async for device in self.iter_devices(projection=projection)]
+        except EberspaecherCircuitOpenError:
+            raise
+        except EberspaecherAPIError as e:
+            if projection == FETCH_HEATER_LEAN and e.status in LEAN_REJECTED_STATUS:
+                return await self._disable_lean(e)
+            # Vorübergehende Fehler (5xx, Login, ...) lassen nur diesen Abruf scheitern
+            _LOGGER.error(f"Fehler get_devices: {e}")
+            return []
         except Exception as e:
             _LOGGER.error(f"Fehler get_devices: {e}")
             return []
 
-    async def get_diagnostics(self, imei):
-        """Holt die Heartbeat-Daten (Spannung, RSSI)."""
-        if not self._token:
-            await self.login()
+        if projection == FETCH_HEATER_LEAN and devices and not any(map(_has_heater_state, devices)):
+            return await self._disable_lean("Antwort ohne heaterState")
+        return devices
+
+    async def _disable_lean(self, reason):
+        _LOGGER.debug(f"fetchHeater={FETCH_HEATER_LEAN} nicht nutzbar ({reason}), nutze {FETCH_HEATER_FULL}")
+        self._lean_supported = False
+        return await self._get_devices(FETCH_HEATER_FULL)
+
+    async def iter_devices(self, page_size=None, projection=FETCH_HEATER_FULL):
+        """Liefert alle Geräte aus /calls, Seite für Seite, sobald sie ankommen.
+
+        Die erste Seite verrät die Gesamtzahl, die restlichen Seiten werden
+        dann parallel geladen. Wirft EberspaecherAPIError, wenn eine Seite fehlt.
+        """
+        size = page_size or self._page_size
+        first = await self._get_devices_page(0, size, projection)
+        for device in first.get("content", []):
+            yield device
 
-        url = f"{API_BASE_URL}/heartbeat/{imei}/latest"
+        total_pages = first.get("totalPages")
+        if total_pages is None and "totalElements" in first:
+            total_pages = -(-first["totalElements"] // size)
 
-        headers = self._headers.copy()
-        headers["escw-auth-token"] = self._token
+        if total_pages is None:
+            # Ohne Gesamtzahl: weiterblättern, bis eine Seite nicht mehr voll ist
+            page_no, page = 0, first
+            while len(page.get("content", [])) >= size:
+                page_no += 1
+                page = await self._get_devices_page(page_no, size, projection)
+                for device in page.get("content", []):
+                    yield device
+            return
 
+        pending = [
+            asyncio.ensure_future(self._get_devices_page(page_no, size, projection))
+            for page_no in range(1, total_pages)
+        ]
         try:
-            async with self._session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                _LOGGER.debug(f"Heartbeat Status: {response.status}")
-                return {}
+            for next_page in asyncio.as_completed(pending):
+                page = await next_page
+                for device in page.get("content", []):
+                    yield device
+        finally:
+            # Bei Abbruch des Aufrufers keine verwaisten Requests zurücklassen
+            for task in pending:
+                task.cancel()
+
+    async def _get_devices_page(self, page_no, size, projection=FETCH_HEATER_FULL):
+        """Eine Seite von /calls."""
+        url = f"{self._base_url}/calls"
+        params = {"fetchHeater": projection, "email": "CURRENT", "page": str(page_no), "size": str(size)}
+
+        async with self._page_semaphore:
+            status, data = await self._request("calls", "GET", url, params=params)
+        if status != 200 or not isinstance(data, dict):
+            raise EberspaecherAPIError(f"/calls Seite {page_no}: Status {status}", status)
+        return data
+
+    async def get_device(self, imei):
+        """Ein einzelnes Fahrzeug (Rohdaten wie in /calls), None wenn nicht verfügbar.
+
+        Nutzt /calls/{imei}; kennt die Cloud den Endpoint nicht, wird ab dann
+        die schlanke Liste geholt und das Fahrzeug daraus genommen (dann ggf.
+        ohne Namen).
+        """
+        if self._single_device_supported:
+            url = f"{self._base_url}/calls/{imei}"
+            params = {"fetchHeater": FETCH_HEATER_FULL, "email": "CURRENT"}
+            try:
+                status, data = await self._request("calls_single", "GET", url, params=params)
+            except EberspaecherCircuitOpenError:
+                raise
+            except Exception as e:
+                _LOGGER.debug(f"Exception get_device {imei}: {e}")
+                return None
+            if status == 200 and isinstance(data, dict) and data.get("imei") == imei:
+                return data
+            if status not in (200, 404, 405):
+                return None
+            _LOGGER.debug(f"/calls/{imei} nicht unterstützt (Status {status}), nutze /calls")
+            self._single_device_supported = False
+
+        # Schlanke Liste reicht für den Status; der FULL-Snapshot im Cache bleibt
+        self._cache.pop(("devices", FETCH_HEATER_LEAN), None)
+        devices = await self.get_devices(full=False)
+        return next((device for device in devices if device.get("imei") == imei), None)
+
+    async def get_diagnostics(self, imei):
+        """Holt die Heartbeat-Daten (Spannung, RSSI). {} bei Fehlern, wirft bei offenem Breaker."""
+        return await self._coalesce(("diagnostics", imei), lambda: self._get_diagnostics(imei))
+
+    async def _get_diagnostics(self, imei):
+        url = f"{self._base_url}/heartbeat/{imei}/latest"
+
+        try:
+            status, data = await self._request("heartbeat", "GET", url)
+            if status == 200:
+                return data or {}
+            _LOGGER.debug(f"Heartbeat Status: {status}")
+            return {}
+        except EberspaecherCircuitOpenError:
+            raise
         except Exception as e:
             _LOGGER.error(f"Exception get_diagnostics: {e}")
             return {}
 
+    async def get_heartbeat_history(self, imei, since=None, page_size=HISTORY_PAGE_SIZE):
+        """Heartbeat-Verlauf eines Fahrzeugs, neuer als `since` (aware datetime).
+
+        Blättert über /heartbeat/{imei} (neueste zuerst), bis ein älterer Eintrag
+        kommt, eine Seite nicht mehr voll ist oder HISTORY_MAX_PAGES erreicht sind.
+        Gibt die Rohdaten zurück, älteste zuerst. Wirft EberspaecherAPIError.
+        Kennt die Cloud den Endpoint nicht (405), wird er ab dann nicht mehr
+        abgefragt; kennt sie nur das Fahrzeug nicht (404), wird nur dieses
+        übersprungen. In beiden Fällen kommt eine leere Liste.
+        """
+        if not self._history_supported or imei in self._history_unsupported:
+            return []
+        url = f"{self._base_url}/heartbeat/{imei}"
+        samples = []
+        for page_no in range(HISTORY_MAX_PAGES):
+            params = {"page": str(page_no), "size": str(page_size), "sort": "timestamp,desc"}
+            status, data = await self._request("heartbeat_history", "GET", url, params=params)
+            if status == 405 and page_no == 0:
+                _LOGGER.debug(f"/heartbeat/{imei} nicht unterstützt (Status {status}), kein Verlauf-Import")
+                self._history_supported = False
+                return []
+            if status == 404 and page_no == 0:
+                _LOGGER.debug(f"Kein Heartbeat-Verlauf für {imei} (Status {status}), Fahrzeug wird übersprungen")
+                self._history_unsupported.add(imei)
+                return []
+            if status != 200:
+                raise EberspaecherAPIError(f"Heartbeat-Verlauf {imei}: Status {status}", status)
+
+            page = data.get("content", []) if isinstance(data, dict) else (data or [])
+            for sample in page:
+                timestamp = parse_timestamp(sample.get("timestamp"))
+                if timestamp is None:
+                    continue
+                if since is not None and timestamp <= since:
+                    return samples[::-1]
+                samples.append(sample)
+            if len(page) < page_size:
+                break
+        return samples[::-1]
+
     async def set_state(self, imei, mode, runtime=30):
         """Schaltet die Heizung (HEATING, VENTILATION, OFF)."""
-        if not self._token:
-            await self.login()
-
-        url = f"{API_BASE_URL}/calls/{imei}/heaters/1"
-        headers = self._headers.copy()
-        headers["escw-auth-token"] = self._token
+        url = f"{self._base_url}/calls/{imei}/heaters/1"
 
         if mode == "OFF":
             payload = {
@@ -108,12 +558,20 @@ class EberspaecherAPI:
             }
 
         try:
-            async with self._session.put(url, json=payload, headers=headers) as response:
-                if response.status in [200, 204]:
-                    return True
-                error_text = await response.text()
-                _LOGGER.error(f"Fehler Schalten ({response.status}): {error_text}")
-                return False
+            status, data = await self._request("set_state", "PUT", url, json=payload)
+            if status in [200, 204]:
+                # Gecachte Daten sind nach dem Schalten veraltet
+                self._cache.pop(("devices", FETCH_HEATER_FULL), None)
+                self._cache.pop(("devices", FETCH_HEATER_LEAN), None)
+                return True
+            if status is not None:
+                _LOGGER.error(f"Fehler Schalten ({status}): {data}")
+            return False
         except Exception as e:
             _LOGGER.error(f"Exception Schalten: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+def _has_heater_state(device):
+    heaters = device.get("heaters")
+    return bool(heaters) and "heaterState" in heaters[0]
@@ -0,0 +1,122 @@
+"""Lernt pro Fahrzeug, wie oft ein neuer Heartbeat kommt, und plant die Abfragen danach."""
+import statistics
+from collections import deque
+
+# Kontrollabruf nach einem neuen Heartbeat bei diesem Anteil des Takts
+PROBE_FRACTION = 0.6
+# Kommt ein Heartbeat deutlich früher als der gelernte Takt, wird neu gelernt
+SPEEDUP_FRACTION = 0.75
+
+
+class HeartbeatCadence:
+    """Abstand neuer Heartbeats (Median der letzten Intervalle) und nächster sinnvoller Abruf.
+
+    Ein Abstand zählt nur, wenn ein Abruf nach der Hälfte der Lücke noch den
+    vorherigen Heartbeat geliefert hat; sonst könnte ein verpasster Heartbeat
+    dazwischen liegen und der Abstand wäre nur der unserer eigenen Abrufe.
+    Solange kein Takt über dem doppelten Grundintervall bekannt ist, wird im
+    Grundintervall abgefragt. Sonst einmal bei PROBE_FRACTION des Takts
+    (liefert die nächste gesicherte Lücke und zeigt, ob das Fahrzeug schneller
+    geworden ist) und dann `grace` Sekunden nach dem erwarteten Heartbeat;
+    bleibt der aus, in kürzeren Abständen. Ein verpasster schnellerer Takt
+    fällt so spätestens nach einem Takt auf. Spätestens nach `max_skip`
+    Sekunden wird immer abgefragt.
+    """
+
+    __slots__ = (
+        "_base", "_grace", "_max_skip", "_min_interval", "_tolerance",
+        "_intervals", "last_sample", "last_fetch", "_checked", "_retry_at",
+        "fetched", "skipped", "unchanged",
+    )
+
+    def __init__(self, base_interval, grace, max_skip, min_interval, tolerance=0.0, history=8):
+        self._base = base_interval
+        self._grace = grace
+        self._max_skip = max_skip
+        self._min_interval = min_interval
+        # HA startet Refreshes bis zu ~1 s zu früh, so knapp vorher gilt schon als fällig
+        self._tolerance = tolerance
+        self._intervals = deque(maxlen=history)
+        # Zeitstempel (Epoch) des letzten neuen Heartbeats und des letzten Abrufs
+        self.last_sample = None
+        self.last_fetch = None
+        # Letzter Abruf, der noch last_sample geliefert hat (None: keiner seitdem)
+        self._checked = None
+        self._retry_at = None
+        self.fetched = 0
+        self.skipped = 0
+        self.unchanged = 0
+
+    @property
+    def cadence(self):
+        """Gelernter Abstand in Sekunden, oder None."""
+        if len(self._intervals) < 2:
+            return None
+        return statistics.median(self._intervals)
+
+    def _skipping(self, cadence):
+        # Erst ab dem doppelten Grundintervall spart Überspringen trotz Kontrollabruf Requests
+        return cadence is not None and cadence > 2 * self._base
+
+    def next_fetch(self):
+        """Zeitpunkt (Epoch) des nächsten sinnvollen Abrufs."""
+        if self.last_fetch is None:
+            return 0.0
+        cadence = self.cadence
+        latest = self.last_fetch + self._max_skip
+        if not self._skipping(cadence) or self.last_sample is None:
+            return min(self.last_fetch + self._base, latest)
+        if self._retry_at is not None:
+            return min(self._retry_at, latest)
+        return min(self.last_sample + cadence + self._grace, latest)
+
+    def is_due(self, now):
+        due = now + self._tolerance >= self.next_fetch()
+        if not due:
+            self.skipped += 1
+        return due
+
+    def observe(self, sample_time, now):
+        """Ergebnis eines Abrufs eintragen. True, wenn es ein neuer Heartbeat ist."""
+        self.fetched += 1
+        self.last_fetch = now
+        if sample_time is None:
+            self._retry_at = None
+            return True
+        cadence = self.cadence
+        if sample_time == self.last_sample:
+            self.unchanged += 1
+            self._checked = now
+            self._retry_at = None
+            if self._skipping(cadence) and now >= self.last_sample + cadence + self._grace - self._tolerance:
+                # Überfällig: bald wieder nachfragen statt einen ganzen Takt zu warten
+                self._retry_at = now + max(self._min_interval, cadence / 4)
+            return False
+
+        if self.last_sample is not None and sample_time > self.last_sample:
+            interval = sample_time - self.last_sample
+            if self._checked is not None and self._checked >= self.last_sample + interval / 2:
+                if interval >= self._min_interval:
+                    self._intervals.append(interval)
+            elif cadence is not None and interval < cadence * SPEEDUP_FRACTION:
+                # Mindestens so schnell wie `interval`: gelernter Takt ist zu lang
+                self._intervals.clear()
+        self.last_sample = sample_time
+        self._checked = None
+        self._retry_at = None
+        cadence = self.cadence
+        if self._skipping(cadence):
+            self._retry_at = max(sample_time + cadence * PROBE_FRACTION, now + self._min_interval)
+        return True
+
+    def as_dict(self, now):
+        cadence = self.cadence
+        return {
+            "cadence_seconds": round(cadence, 1) if cadence is not None else None,
+            "intervals": len(self._intervals),
+            "seconds_since_sample": round(now - self.last_sample, 1) if self.last_sample else None,
+            "next_fetch_in_seconds": round(max(self.next_fetch() - now, 0.0), 1),
+            "fetched": self.fetched,
+            "skipped": self.skipped,
+            "unchanged": self.unchanged,
+        }
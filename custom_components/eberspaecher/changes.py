@@ -0,0 +1,48 @@
+"""Änderungserkennung zwischen zwei Snapshots, pro IMEI und Feld."""
+
+
+class ChangeTracker:
+    """Merkt sich den zuletzt gemeldeten Wert jedes Feldes und meldet nur echte Änderungen.
+
+    fields: Feldname -> Funktion(payload) -> Wert
+    tolerances: Feldname -> Mindestabweichung für numerische Werte (z.B. Spannung)
+    """
+
+    def __init__(self, fields, tolerances=None):
+        self._fields = fields
+        self._tolerances = tolerances or {}
+        # (imei, feld) -> zuletzt gemeldeter Wert
+        self._reported = {}
+        self._imeis = set()
+
+    def update(self, snapshot):
+        """Vergleicht den neuen Snapshot und gibt {imei: {geänderte Felder}} zurück."""
+        changed = {}
+        for imei, payload in snapshot.items():
+            for field, extract in self._fields.items():
+                value = extract(payload)
+                key = (imei, field)
+                if key in self._reported and not self._differs(field, self._reported[key], value):
+                    continue
+                # Verglichen wird immer mit dem zuletzt gemeldeten Wert, damit
+                # langsames Driften unterhalb der Toleranz trotzdem ankommt
+                self._reported[key] = value
+                changed.setdefault(imei, set()).add(field)
+
+        # Verschwundene Fahrzeuge: alle Felder als geändert melden
+        for imei in self._imeis - snapshot.keys():
+            changed[imei] = set(self._fields)
+            for field in self._fields:
+                self._reported.pop((imei, field), None)
+        self._imeis = set(snapshot)
+        return changed
+
+    def _differs(self, field, old, new):
+        tolerance = self._tolerances.get(field)
+        if (
+            tolerance
+            and isinstance(old, (int, float))
+            and isinstance(new, (int, float))
+        ):
+            return abs(new - old) >= tolerance
+        return old != new
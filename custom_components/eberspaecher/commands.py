@@ -0,0 +1,82 @@
+"""Befehlswarteschlange pro Fahrzeug für set_state."""
+import asyncio
+import logging
+
+from .api import EberspaecherAPI
+from .const import COMMAND_CONCURRENCY, COMMAND_DEBOUNCE_SECONDS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandQueue:
+    """Serialisiert und bündelt Schaltbefehle pro IMEI.
+
+    - Pro Heizung läuft höchstens ein PUT gleichzeitig, insgesamt höchstens `concurrency`.
+    - Neue Befehle ersetzen einen noch wartenden Befehl (last writer wins).
+    - Aufrufer, deren Befehl ersetzt wurde, bekommen das Ergebnis des Befehls,
+      der stattdessen gesendet wurde.
+    """
+
+    def __init__(self, api: EberspaecherAPI, debounce=COMMAND_DEBOUNCE_SECONDS, concurrency=COMMAND_CONCURRENCY):
+        self._api = api
+        self._debounce = debounce
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # IMEI -> (mode, runtime, [Futures der wartenden Aufrufer])
+        self._pending = {}
+        # IMEI -> Worker-Task
+        self._workers = {}
+
+    async def async_set_state(self, imei, mode, runtime=30):
+        """Befehl einreihen und auf das Ergebnis warten (True/False)."""
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.get(imei)
+        waiters = pending[2] if pending else []
+        waiters.append(future)
+        self._pending[imei] = (mode, runtime, waiters)
+
+        if imei not in self._workers:
+            self._workers[imei] = asyncio.create_task(self._async_worker(imei))
+        return await asyncio.shield(future)
+
+    async def async_set_state_bulk(self, commands):
+        """Mehrere Befehle {imei: (mode, runtime)} gleichzeitig senden, gibt {imei: True/False} zurück."""
+        results = await asyncio.gather(
+            *(self.async_set_state(imei, mode, runtime) for imei, (mode, runtime) in commands.items())
+        )
+        return dict(zip(commands, results))
+
+    async def _async_worker(self, imei):
+        """Sendet den jeweils neuesten Befehl, bis nichts mehr aussteht."""
+        try:
+            while imei in self._pending:
+                # Kurz warten, damit schnelle Folgebefehle zusammengefasst werden
+                await asyncio.sleep(self._debounce)
+                mode, runtime, waiters = self._pending.pop(imei)
+                result = False
+                try:
+                    async with self._semaphore:
+                        result = await self._api.set_state(imei, mode, runtime=runtime)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    _LOGGER.error(f"Exception Schalten {imei}: {e}")
+                finally:
+                    # Auch bei Abbruch (Entladen) bekommen die Aufrufer ein Ergebnis
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(result)
+        finally:
+            self._workers.pop(imei, None)
+
+    async def async_shutdown(self):
+        """Offene Befehle abbrechen (beim Entladen der Integration)."""
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        for _, _, waiters in self._pending.values():
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(False)
+        self._pending.clear()
+        # Warten, bis die Worker die Aufrufer des gerade gesendeten Befehls beantwortet haben
+        await asyncio.gather(*workers, return_exceptions=True)
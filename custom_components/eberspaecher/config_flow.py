@@ -1,9 +1,17 @@
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.core import callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from .const import DOMAIN
-from .api import EberspaecherAPI
+from .const import (
+    DOMAIN,
+    CONF_HEARTBEAT_CONCURRENCY,
+    CONF_HEDGE_REQUESTS,
+    CONF_PAGE_SIZE,
+    CONF_TOKEN,
+    DEFAULT_HEARTBEAT_CONCURRENCY,
+)
+from .api import EberspaecherAPI, DEFAULT_PAGE_SIZE
 
 
 class EberspaecherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -26,10 +34,11 @@ class EberspaecherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             login_ok = await api.login()
 
             if login_ok:
-                # 2. Speichere die Konfiguration
+                # 2. Speichere die Konfiguration (inkl. Token, damit das Setup
+                #    nicht sofort erneut einloggen muss)
                 return self.async_create_entry(
                     title=user_input[CONF_USERNAME],
-                    data=user_input
+                    data={**user_input, CONF_TOKEN: api.token}
                 )
             else:
                 errors["base"] = "invalid_auth"
@@ -42,4 +51,39 @@ class EberspaecherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_PASSWORD): str,
             }),
             errors=errors,
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return EberspaecherOptionsFlow(config_entry)
+
+
+class EberspaecherOptionsFlow(config_entries.OptionsFlow):
+    """Optionen für Polling und Parallelität."""
+
+    def __init__(self, config_entry):
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_HEARTBEAT_CONCURRENCY,
+                    default=options.get(CONF_HEARTBEAT_CONCURRENCY, DEFAULT_HEARTBEAT_CONCURRENCY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+                vol.Optional(
+                    CONF_PAGE_SIZE,
+                    default=options.get(CONF_PAGE_SIZE, DEFAULT_PAGE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Optional(
+                    CONF_HEDGE_REQUESTS,
+                    default=options.get(CONF_HEDGE_REQUESTS, False),
+                ): bool,
+            }),
+        )
@@ -8,4 +8,86 @@ API_BASE_URL = "https://myeberspaecher.com/api/v1"
 
 DEFAULT_RUNTIME = 30
 MODE_HEATING = "HEATING"
-MODE_VENTILATION = "VENTILATION"
\ No newline at end of file
+MODE_VENTILATION = "VENTILATION"
+MODE_OFF = "OFF"
+
+# Abfrageintervall für den gemeinsamen /calls Snapshot
+UPDATE_INTERVAL_SECONDS = 60
+
+# Heartbeat (/heartbeat/{imei}/latest): max. parallele Requests pro Zyklus
+CONF_HEARTBEAT_CONCURRENCY = "heartbeat_concurrency"
+DEFAULT_HEARTBEAT_CONCURRENCY = 5
+
+# Auth-Token aus dem Config Flow (entry.data) und im HA-Speicher
+CONF_TOKEN = "token"
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+# Der letzte Geräte-Snapshot für den Schnellstart wird seltener geschrieben
+SNAPSHOT_SAVE_DELAY = 60
+
+# Geräte pro /calls Seite
+CONF_PAGE_SIZE = "page_size"
+
+# Langsame GETs (/calls, Heartbeat) nach p95 der Latenz ein zweites Mal senden
+CONF_HEDGE_REQUESTS = "hedge_requests"
+
+# Adaptives Polling: langsam, solange alle Heizungen aus sind, schnell bei Betrieb
+POLL_INTERVAL_IDLE_SECONDS = 300
+POLL_INTERVAL_ACTIVE_SECONDS = 20
+# Extra-Abfrage kurz nachdem remainingRuntime abgelaufen sein sollte
+RUNTIME_END_GRACE_SECONDS = 15
+HEATER_STATE_OFF = "OFF"
+# Zwischenzustände direkt nach einem Schaltbefehl
+HEATER_STATES_PENDING = ("ACTIVATION_REQUESTED", "DEACTIVATION_REQUESTED")
+
+# Änderungserkennung: Mindestabweichung, ab der ein Wert als geändert gilt
+# (Rohwerte vom Heartbeat: Spannung in mV, RSSI als CSQ 0-31)
+CHANGE_TOLERANCES = {
+    "voltage": 50,
+    "rssi": 2,
+}
+
+# Schaltbefehle: kurze Wartezeit, um schnelle Folgebefehle zusammenzufassen
+COMMAND_DEBOUNCE_SECONDS = 0.5
+# Max. gleichzeitige Schaltbefehle (PUT) über alle Fahrzeuge eines Kontos
+COMMAND_CONCURRENCY = 10
+
+# Heartbeat-Verlauf -> Langzeitstatistik: Abstand der Importe, Fahrzeuge pro Batch
+# und wie weit beim allerersten Import zurückgegangen wird
+HISTORY_IMPORT_INTERVAL_HOURS = 1
+HISTORY_IMPORT_CONCURRENCY = 3
+HISTORY_INITIAL_DAYS = 7
+
+# Gemeinsames Request-Budget aller Konten (Token-Bucket) und wie lange ein
+# nicht mehr benutzter Client offen bleibt (z.B. während eines Reloads)
+GLOBAL_RATE_LIMIT_PER_SECOND = 10
+GLOBAL_RATE_LIMIT_BURST = 20
+CLIENT_RELEASE_GRACE_SECONDS = 30
+
+# Verlauf im Speicher: Messwerte pro Fahrzeug und Größe, ab wann ein Trend
+# gilt und ab welchem Spannungsabfall die Batterie als "entladend" zählt
+TREND_WINDOW_SAMPLES = 96
+TREND_MIN_SAMPLES = 4
+BATTERY_LOW_VOLTS = 11.8
+BATTERY_DRAIN_MIN_VOLTS_PER_HOUR = 0.02
+
+# Nach einem Schaltbefehl nur das betroffene Fahrzeug abfragen: Wartezeiten
+# zwischen den Abfragen und Frist, danach gilt wieder das normale Polling
+CONFIRM_DELAYS_SECONDS = (2, 3, 5, 8, 13, 20)
+CONFIRM_DEADLINE_SECONDS = 60
+
+# Spätestens nach dieser Zeit pollt der Coordinator wieder mit fetchHeater=FULL,
+# sonst mit der schlanken Projektion
+FULL_REFRESH_INTERVAL_SECONDS = 3600
+
+# Heartbeat-Takt: erst so lange nach dem erwarteten neuen Heartbeat abfragen,
+# dann frühestens wieder nach HEARTBEAT_MIN_INTERVAL_SECONDS, spätestens aber
+# nach HEARTBEAT_MAX_SKIP_SECONDS (falls sich der Takt ändert)
+HEARTBEAT_FETCH_GRACE_SECONDS = 30
+HEARTBEAT_MIN_INTERVAL_SECONDS = 15
+HEARTBEAT_MAX_SKIP_SECONDS = 3600
+# Refreshes von HA kommen bis zu ~1 s zu früh, so knapp vorher gilt ein Abruf schon als fällig
+HEARTBEAT_DUE_TOLERANCE_SECONDS = 2
+
+# Flotten-Sensor: Heartbeats älter als das gelten als "nicht aktuell"
+FLEET_HEARTBEAT_STALE_SECONDS = 6 * 3600
@@ -0,0 +1,357 @@
+"""DataUpdateCoordinator für die Eberspächer Integration."""
+from abc import ABC, abstractmethod
+import asyncio
+from datetime import timedelta
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import EberspaecherAPI, EberspaecherCircuitOpenError
+from .cadence import HeartbeatCadence
+from .changes import ChangeTracker
+from .models import Heartbeat, Vehicle
+from .const import (
+    CHANGE_TOLERANCES,
+    CONFIRM_DEADLINE_SECONDS,
+    CONFIRM_DELAYS_SECONDS,
+    DOMAIN,
+    FULL_REFRESH_INTERVAL_SECONDS,
+    HEATER_STATE_OFF,
+    HEATER_STATES_PENDING,
+    HEARTBEAT_DUE_TOLERANCE_SECONDS,
+    HEARTBEAT_FETCH_GRACE_SECONDS,
+    HEARTBEAT_MAX_SKIP_SECONDS,
+    HEARTBEAT_MIN_INTERVAL_SECONDS,
+    POLL_INTERVAL_ACTIVE_SECONDS,
+    POLL_INTERVAL_IDLE_SECONDS,
+    RUNTIME_END_GRACE_SECONDS,
+    UPDATE_INTERVAL_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Felder aus /calls, auf die Entitäten reagieren
+DEVICE_FIELDS = {
+    "name": lambda vehicle: vehicle.name,
+    "heater_state": lambda vehicle: vehicle.heater_state,
+    "temperature": lambda vehicle: vehicle.heater.temperature if vehicle.heater else None,
+    "remaining_runtime": lambda vehicle: vehicle.heater.remaining_runtime if vehicle.heater else None,
+}
+
+# Felder aus /heartbeat/{imei}/latest
+HEARTBEAT_FIELDS = {
+    "voltage": lambda heartbeat: heartbeat.voltage,
+    "rssi": lambda heartbeat: heartbeat.rssi,
+    "timestamp": lambda heartbeat: heartbeat.timestamp,
+}
+
+
+class EberspaecherTrackedCoordinator(DataUpdateCoordinator, ABC):
+    """Coordinator, der pro Update merkt, welche Felder sich je IMEI geändert haben.
+
+    Entitäten fragen über has_changed() nach und schreiben ihren State nur,
+    wenn sich ihre Werte wirklich geändert haben.
+    """
+
+    def __init__(self, hass: HomeAssistant, name, fields):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=name,
+            update_interval=timedelta(seconds=UPDATE_INTERVAL_SECONDS),
+        )
+        self._tracker = ChangeTracker(fields, CHANGE_TOLERANCES)
+        # IMEI -> Menge geänderter Felder aus dem letzten Update
+        self.changes = {}
+        # True, solange die Daten nur aus dem gespeicherten Snapshot stammen
+        self.restored = False
+
+    @callback
+    def async_restore(self, data):
+        """Startwerte aus dem gespeicherten Snapshot übernehmen, ohne Request."""
+        self.data = data
+        self.restored = True
+        self._tracker.update(data)
+
+    async def _async_update_data(self):
+        self.changes = {}
+        try:
+            data = await self._async_fetch_data()
+        except EberspaecherCircuitOpenError as err:
+            # Cloud gestört: sofort abbrechen, Entitäten werden unavailable
+            self.restored = False
+            raise UpdateFailed(str(err)) from err
+        except Exception:
+            # Live-Abruf gescheitert: der gespeicherte Snapshot hält Entitäten nicht länger verfügbar
+            self.restored = False
+            raise
+        self.changes = self._tracker.update(data)
+        self.restored = False
+        return data
+
+    @abstractmethod
+    async def _async_fetch_data(self):
+        """Daten holen und als {IMEI: Modell} zurückgeben."""
+
+    def has_changed(self, imei, fields):
+        """True, wenn sich eines der Felder beim letzten Update geändert hat."""
+        return not self.changes.get(imei, set()).isdisjoint(fields)
+
+
+class EberspaecherCoordinator(EberspaecherTrackedCoordinator):
+    """Holt /calls einmal pro Intervall und teilt den Snapshot mit allen Entitäten."""
+
+    def __init__(self, hass: HomeAssistant, api: EberspaecherAPI):
+        super().__init__(hass, DOMAIN, DEVICE_FIELDS)
+        self.api = api
+        self._unsub_runtime_end = None
+        # IMEI -> laufende Bestätigung nach einem Schaltbefehl
+        self._confirmations = {}
+        # Zeitpunkt (monotonic) des letzten Abrufs mit fetchHeater=FULL
+        self._last_full = None
+
+    async def _async_fetch_data(self):
+        """Ein Request pro Zyklus, egal wie viele Fahrzeuge und Entitäten.
+
+        FULL nur beim Start, nach FULL_REFRESH_INTERVAL_SECONDS und wenn das
+        schlanke Polling neue/fehlende Fahrzeuge oder geänderte Namen zeigt.
+        """
+        full = self._full_refresh_due()
+        data = await self._async_fetch_vehicles(full)
+        if not full and self._metadata_changed(data):
+            _LOGGER.debug("Fahrzeugliste geändert, hole /calls mit fetchHeater=FULL")
+            full = True
+            data = await self._async_fetch_vehicles(full)
+        if full:
+            self._last_full = time.monotonic()
+
+        self._adapt_polling(data)
+        return data
+
+    async def _async_fetch_vehicles(self, full):
+        devices = await self.api.get_devices(full=full)
+        if not devices:
+            # Die API liefert bei Fehlern eine leere Liste
+            raise UpdateFailed("Keine Gerätedaten von /calls erhalten")
+
+        # Einmal parsen, Index IMEI -> Vehicle für alle Entitäten
+        previous = self.data or {}
+        data = {}
+        for dev in devices:
+            imei = dev.get("imei")
+            if not imei:
+                continue
+            if "name" not in dev and imei in previous:
+                # Schlanke Antworten dürfen den Namen weglassen
+                dev = {**dev, "name": previous[imei].name}
+            data[imei] = Vehicle.from_json(dev)
+        return data
+
+    def _full_refresh_due(self):
+        if self._last_full is None or self.restored or not self.data:
+            return True
+        elapsed = time.monotonic() - self._last_full
+        return elapsed >= FULL_REFRESH_INTERVAL_SECONDS
+
+    def _metadata_changed(self, data):
+        """Neue oder verschwundene Fahrzeuge bzw. geänderte Namen seit dem letzten Snapshot."""
+        previous = self.data or {}
+        if data.keys() != previous.keys():
+            return True
+        return any(vehicle.name != previous[imei].name for imei, vehicle in data.items())
+
+    def _adapt_polling(self, data):
+        """Intervall an den Heizungsstatus anpassen.
+
+        Alle aus: langsam pollen. Mindestens eine aktiv: schnell pollen und
+        zusätzlich genau dann abfragen, wenn die kürzeste Restlaufzeit endet.
+        """
+        active = False
+        remaining = []
+        for vehicle in data.values():
+            if not vehicle.is_active:
+                continue
+            active = True
+            if vehicle.heater.remaining_runtime:
+                remaining.append(vehicle.heater.remaining_runtime)
+
+        seconds = POLL_INTERVAL_ACTIVE_SECONDS if active else POLL_INTERVAL_IDLE_SECONDS
+        self.update_interval = timedelta(seconds=seconds)
+
+        self._cancel_runtime_end()
+        if remaining:
+            # remainingRuntime kommt in Minuten
+            delay = min(remaining) * 60 + RUNTIME_END_GRACE_SECONDS
+            if delay > seconds:
+                self._unsub_runtime_end = async_call_later(
+                    self.hass, delay, self._async_runtime_ended
+                )
+
+    async def _async_runtime_ended(self, _now):
+        """Restlaufzeit sollte jetzt abgelaufen sein: Status sofort prüfen."""
+        self._unsub_runtime_end = None
+        await self.async_request_refresh()
+
+    @callback
+    def _cancel_runtime_end(self):
+        if self._unsub_runtime_end is not None:
+            self._unsub_runtime_end()
+            self._unsub_runtime_end = None
+
+    @callback
+    def async_confirm(self, imei, is_on):
+        """Nach einem Schaltbefehl nur dieses Fahrzeug kurz hintereinander abfragen.
+
+        Endet, sobald der Zielzustand (an bzw. OFF) gemeldet wird oder
+        CONFIRM_DEADLINE_SECONDS vorbei sind; danach gilt wieder das normale Polling.
+        """
+        task = self._confirmations.pop(imei, None)
+        if task is not None:
+            task.cancel()
+        self._confirmations[imei] = self.hass.async_create_background_task(
+            self._async_confirm(imei, is_on), f"{DOMAIN}_confirm_{imei}"
+        )
+
+    async def _async_confirm(self, imei, is_on):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CONFIRM_DEADLINE_SECONDS
+        try:
+            for delay in CONFIRM_DELAYS_SECONDS:
+                if loop.time() + delay > deadline:
+                    break
+                await asyncio.sleep(delay)
+                raw = await self.api.get_device(imei)
+                if not raw:
+                    continue
+                if "name" not in raw and imei in (self.data or {}):
+                    # Schlanke Antworten dürfen den Namen weglassen
+                    raw = {**raw, "name": self.data[imei].name}
+                vehicle = Vehicle.from_json(raw)
+                self._async_set_vehicle(vehicle)
+                if self._is_confirmed(vehicle, is_on):
+                    _LOGGER.debug(f"{imei}: Zustand {vehicle.heater_state} bestätigt")
+                    return
+            _LOGGER.debug(f"{imei}: Zustand nicht bestätigt, weiter mit normalem Polling")
+        except EberspaecherCircuitOpenError:
+            pass
+        finally:
+            if self._confirmations.get(imei) is asyncio.current_task():
+                del self._confirmations[imei]
+
+    @staticmethod
+    def _is_confirmed(vehicle, is_on):
+        state = vehicle.heater_state
+        if is_on:
+            return vehicle.is_active and state not in HEATER_STATES_PENDING
+        return state == HEATER_STATE_OFF
+
+    @callback
+    def _async_set_vehicle(self, vehicle):
+        """Ein Fahrzeug im Snapshot ersetzen.
+
+        Der Timer fürs Flotten-Polling läuft weiter, außer das Intervall wird
+        kürzer (z.B. Heizung an): dann wird er auf das neue Intervall gelegt.
+        """
+        if not self.data or vehicle.imei not in self.data:
+            return
+        data = {**self.data, vehicle.imei: vehicle}
+        self.changes = self._tracker.update(data)
+        self.data = data
+        previous = self.update_interval
+        self._adapt_polling(data)
+        if self._listeners and self.update_interval < previous:
+            self._unschedule_refresh()
+            self._schedule_refresh()
+        self.async_update_listeners()
+
+    async def async_shutdown(self):
+        self._cancel_runtime_end()
+        for task in self._confirmations.values():
+            task.cancel()
+        self._confirmations.clear()
+        await super().async_shutdown()
+
+
+class EberspaecherHeartbeatCoordinator(EberspaecherTrackedCoordinator):
+    """Holt Heartbeats parallel und begrenzt, pro Fahrzeug nach dessen gelerntem Takt.
+
+    Ein Fahrzeug wird erst kurz nach seinem erwarteten nächsten Heartbeat
+    wieder abgefragt (bei laufender Heizung in jedem Zyklus). Das Intervall
+    des Coordinators richtet sich nach dem frühesten fälligen Fahrzeug.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: EberspaecherAPI,
+        devices: EberspaecherCoordinator,
+        concurrency: int,
+    ):
+        super().__init__(hass, f"{DOMAIN}_heartbeat", HEARTBEAT_FIELDS)
+        self.api = api
+        self._devices = devices
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        # IMEI -> HeartbeatCadence
+        self.cadences = {}
+
+    def _cadence(self, imei):
+        cadence = self.cadences.get(imei)
+        if cadence is None:
+            cadence = self.cadences[imei] = HeartbeatCadence(
+                UPDATE_INTERVAL_SECONDS,
+                HEARTBEAT_FETCH_GRACE_SECONDS,
+                HEARTBEAT_MAX_SKIP_SECONDS,
+                HEARTBEAT_MIN_INTERVAL_SECONDS,
+                HEARTBEAT_DUE_TOLERANCE_SECONDS,
+            )
+        return cadence
+
+    async def _async_fetch(self, imei):
+        """Ein Heartbeat-Request, begrenzt durch das Semaphore."""
+        async with self._semaphore:
+            return imei, await self.api.get_diagnostics(imei)
+
+    async def _async_fetch_data(self):
+        """Alle fälligen IMEIs gleichzeitig abfragen (max. `concurrency` auf einmal)."""
+        vehicles = self._devices.data or {}
+        now = time.time()
+        # Bei laufender Heizung immer abfragen, sonst nur, wenn ein neuer Heartbeat zu erwarten ist
+        imeis = [
+            imei for imei, vehicle in vehicles.items()
+            if self.data is None or imei not in self.data or vehicle.is_active
+            or self._cadence(imei).is_due(now)
+        ]
+        results = await asyncio.gather(*(self._async_fetch(imei) for imei in imeis))
+
+        # Bei einzelnen Fehlern behalten wir den letzten bekannten Heartbeat
+        data = dict(self.data or {})
+        received = 0
+        now = time.time()
+        for imei, diag in results:
+            if not diag:
+                continue
+            received += 1
+            heartbeat = Heartbeat.from_json(diag)
+            sample_time = heartbeat.time
+            if self._cadence(imei).observe(sample_time.timestamp() if sample_time else None, now):
+                data[imei] = heartbeat
+
+        if imeis and not received:
+            raise UpdateFailed("Kein Heartbeat erhalten")
+        self._schedule_next(vehicles, now)
+        return data
+
+    def _schedule_next(self, vehicles, now):
+        """Nächsten Lauf auf den frühesten fälligen Abruf legen (höchstens UPDATE_INTERVAL_SECONDS)."""
+        if any(vehicle.is_active for vehicle in vehicles.values()):
+            seconds = UPDATE_INTERVAL_SECONDS
+        else:
+            earliest = min(
+                (self._cadence(imei).next_fetch() for imei in vehicles), default=now + UPDATE_INTERVAL_SECONDS
+            )
+            seconds = min(max(earliest - now, HEARTBEAT_MIN_INTERVAL_SECONDS), UPDATE_INTERVAL_SECONDS)
+        self.update_interval = timedelta(seconds=seconds)
@@ -0,0 +1,41 @@
+"""Diagnose-Download für die Eberspächer Integration."""
+import time
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_TOKEN, DOMAIN
+
+# Zugangsdaten und Token nie in den Download schreiben
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, CONF_TOKEN, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Messwerte des API-Clients und Polling-Zustand."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    api = data["api"]
+    coordinator = data["coordinator"]
+    heartbeat = data["heartbeat"]
+    now = time.time()
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "api": {
+            "circuit_state": api.circuit_state,
+            "metrics": api.metrics.as_dict(),
+        },
+        "polling": {
+            "vehicles": len(coordinator.data or {}),
+            "calls_interval_seconds": coordinator.update_interval.total_seconds(),
+            "calls_last_update_success": coordinator.last_update_success,
+            "heartbeat_interval_seconds": heartbeat.update_interval.total_seconds(),
+            "heartbeat_last_update_success": heartbeat.last_update_success,
+            "restored": coordinator.restored,
+        },
+        # Gelernter Heartbeat-Takt pro Fahrzeug (IMEI gekürzt)
+        "heartbeat_cadence": {
+            f"…{imei[-4:]}": cadence.as_dict(now) for imei, cadence in heartbeat.cadences.items()
+        },
+    }
@@ -0,0 +1,61 @@
+"""Gemeinsame Basisklasse für Entitäten, die den /calls Snapshot lesen."""
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import EberspaecherCoordinator
+
+
+class EberspaecherEntity(CoordinatorEntity):
+    """Hält die IMEI und liest das Gerät aus dem Coordinator-Index."""
+
+    # Felder aus dem Snapshot, die diese Entität anzeigt (None: bei jedem Update schreiben)
+    _fields = None
+
+    def __init__(self, coordinator: EberspaecherCoordinator, imei):
+        super().__init__(coordinator)
+        self._imei = imei
+        self._name_prefix = self.vehicle.name if self.vehicle else "Eberspächer"
+        self._last_status = None
+
+    @callback
+    def _handle_coordinator_update(self):
+        """State nur schreiben, wenn sich die eigenen Felder geändert haben."""
+        if self._needs_write(self.coordinator, self._fields):
+            self.async_write_ha_state()
+
+    def _needs_write(self, coordinator, fields):
+        # Verfügbarkeit oder "restored" geändert: immer schreiben
+        status = (self.available, self.restored)
+        if status != self._last_status:
+            self._last_status = status
+            return True
+        if fields is None:
+            return True
+        return coordinator.has_changed(self._imei, fields)
+
+    @property
+    def vehicle(self):
+        """Aktuelles Fahrzeug (Vehicle) aus dem gemeinsamen Index, oder None."""
+        return (self.coordinator.data or {}).get(self._imei)
+
+    @property
+    def heater(self):
+        vehicle = self.vehicle
+        return vehicle.heater if vehicle else None
+
+    @property
+    def restored(self):
+        """True, solange nur der gespeicherte Snapshot vom letzten Lauf vorliegt."""
+        return self.coordinator.restored
+
+    @property
+    def available(self):
+        # Gespeicherte Werte bleiben sichtbar, bis Live-Daten da sind
+        live = super().available or self.coordinator.restored
+        return live and self._imei in (self.coordinator.data or {})
+
+    @property
+    def extra_state_attributes(self):
+        if self.restored:
+            return {"restored": True}
+        return None
@@ -0,0 +1,103 @@
+"""Kennzahlen über alle Fahrzeuge eines Kontos, inkrementell pro geändertem Fahrzeug gepflegt."""
+from bisect import bisect_left, insort
+
+
+class _SortedIndex:
+    """Sortierte (Wert, IMEI)-Liste plus IMEI -> Wert, Änderungen in O(log n) Suche."""
+
+    __slots__ = ("_items", "_values")
+
+    def __init__(self):
+        self._items = []
+        self._values = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def set(self, imei, value):
+        old = self._values.get(imei)
+        if old == value:
+            return
+        if old is not None:
+            self.discard(imei)
+        if value is not None:
+            self._values[imei] = value
+            insort(self._items, (value, imei))
+
+    def discard(self, imei):
+        value = self._values.pop(imei, None)
+        if value is not None:
+            del self._items[bisect_left(self._items, (value, imei))]
+
+    def first(self):
+        """Kleinster Eintrag als (Wert, IMEI), oder None."""
+        return self._items[0] if self._items else None
+
+    def count_below(self, value):
+        return bisect_left(self._items, (value,))
+
+
+class FleetAggregates:
+    """Aktive Heizungen, niedrigste Spannung und veraltete Heartbeats der ganzen Flotte.
+
+    Die Coordinators melden pro Update nur die geänderten IMEIs; nur diese
+    werden hier angefasst. Abfragen sind O(1) bzw. O(log n).
+    """
+
+    def __init__(self):
+        self._vehicles = {}
+        self._active = set()
+        self._voltages = _SortedIndex()
+        self._heartbeat_times = _SortedIndex()
+
+    def update_vehicles(self, data, imeis):
+        """Fahrzeuge aus dem /calls Snapshot übernehmen (nur die übergebenen IMEIs).
+
+        Gibt die neu hinzugekommenen IMEIs zurück, deren Heartbeats noch fehlen.
+        """
+        added = []
+        for imei in imeis:
+            vehicle = data.get(imei)
+            if vehicle is None:
+                self._vehicles.pop(imei, None)
+                self._active.discard(imei)
+                self._voltages.discard(imei)
+                self._heartbeat_times.discard(imei)
+                continue
+            if imei not in self._vehicles:
+                added.append(imei)
+            self._vehicles[imei] = vehicle
+            if vehicle.is_active:
+                self._active.add(imei)
+            else:
+                self._active.discard(imei)
+        return added
+
+    def update_heartbeats(self, data, imeis):
+        """Heartbeats übernehmen (nur die übergebenen IMEIs bekannter Fahrzeuge)."""
+        for imei in imeis:
+            heartbeat = data.get(imei)
+            if heartbeat is None or imei not in self._vehicles:
+                self._voltages.discard(imei)
+                self._heartbeat_times.discard(imei)
+                continue
+            self._voltages.set(imei, heartbeat.voltage_volts)
+            sample_time = heartbeat.time
+            self._heartbeat_times.set(imei, sample_time.timestamp() if sample_time else None)
+
+    @property
+    def active_count(self):
+        return len(self._active)
+
+    @property
+    def lowest_voltage(self):
+        """(Spannung in V, Vehicle) des Fahrzeugs mit der niedrigsten Spannung, oder None."""
+        lowest = self._voltages.first()
+        if lowest is None:
+            return None
+        return lowest[0], self._vehicles.get(lowest[1])
+
+    def stale_count(self, now, max_age):
+        """Fahrzeuge ohne Heartbeat oder mit einem, der älter als `max_age` Sekunden ist."""
+        without = len(self._vehicles) - len(self._heartbeat_times)
+        return without + self._heartbeat_times.count_below(now - max_age)
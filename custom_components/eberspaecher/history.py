@@ -0,0 +1,131 @@
+"""Heartbeat-Verlauf (Spannung, Signal) als Langzeitstatistik in Home Assistant importieren."""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.const import SIGNAL_STRENGTH_DECIBELS_MILLIWATT, UnitOfElectricPotential
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, HISTORY_IMPORT_CONCURRENCY, HISTORY_INITIAL_DAYS
+from .models import Heartbeat, parse_timestamp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Statistik-Key -> (Name, Einheit, Wert aus dem Heartbeat)
+HISTORY_STATISTICS = {
+    "voltage": ("Spannung", UnitOfElectricPotential.VOLT, lambda hb: hb.voltage_volts),
+    "rssi": ("Signal", SIGNAL_STRENGTH_DECIBELS_MILLIWATT, lambda hb: hb.rssi_dbm),
+}
+
+
+def statistic_id(imei, key):
+    """Externe Statistik-ID, z.B. eberspaecher:123456789012345_voltage."""
+    return f"{DOMAIN}:{str(imei).lower()}_{key}"
+
+
+def hourly_statistics(samples, key, until):
+    """Rohdaten zu Stundenwerten (mean/min/max) zusammenfassen.
+
+    Nur abgeschlossene Stunden vor `until`, damit ein späterer Import
+    keine halbe Stunde überschreibt.
+    """
+    value_of = HISTORY_STATISTICS[key][2]
+    hours = {}
+    for sample in samples:
+        timestamp = parse_timestamp(sample.get("timestamp"))
+        value = value_of(Heartbeat.from_json(sample))
+        if timestamp is None or value is None:
+            continue
+        # Erst nach UTC, sonst liegt der Stundenbeginn bei Offsets wie +05:30 nicht auf der vollen Stunde
+        start = dt_util.as_utc(timestamp).replace(minute=0, second=0, microsecond=0)
+        if start + timedelta(hours=1) > until:
+            continue
+        hours.setdefault(start, []).append(value)
+
+    return [
+        {"start": start, "mean": sum(values) / len(values), "min": min(values), "max": max(values)}
+        for start, values in sorted(hours.items())
+    ]
+
+
+class HeartbeatHistoryImporter:
+    """Importiert den Heartbeat-Verlauf aller Fahrzeuge inkrementell als Stundenstatistik."""
+
+    def __init__(self, hass: HomeAssistant, api, coordinator, concurrency=HISTORY_IMPORT_CONCURRENCY):
+        self.hass = hass
+        self.api = api
+        self.coordinator = coordinator
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+
+    async def async_import(self, now=None):
+        """Alle Fahrzeuge importieren; ein laufender Import wird nicht doppelt gestartet."""
+        if "recorder" not in self.hass.config.components or not self.coordinator.data:
+            return
+        if self._lock.locked():
+            return
+        async with self._lock:
+            await asyncio.gather(*(self._async_import_vehicle(imei) for imei in self.coordinator.data))
+
+    async def _async_import_vehicle(self, imei):
+        async with self._semaphore:
+            try:
+                since = await self._async_last_imported(imei)
+                samples = await self.api.get_heartbeat_history(imei, since)
+            except Exception as e:
+                _LOGGER.debug(f"Heartbeat-Verlauf {imei} nicht importiert: {e}")
+                return
+
+        if not samples:
+            return
+        until = dt_util.utcnow()
+        for key in HISTORY_STATISTICS:
+            self._async_add(imei, key, hourly_statistics(samples, key, until))
+
+    async def _async_last_imported(self, imei):
+        """Beginn der zuletzt importierten Stunde (über alle Statistiken), sonst HISTORY_INITIAL_DAYS zurück."""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        last = None
+        for key in HISTORY_STATISTICS:
+            stat_id = statistic_id(imei, key)
+            result = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics, self.hass, 1, stat_id, True, {"mean"}
+            )
+            rows = result.get(stat_id)
+            if not rows:
+                continue
+            start = rows[0]["start"]
+            if isinstance(start, (int, float)):
+                start = datetime.fromtimestamp(start, timezone.utc)
+            # Die Stunde ist komplett importiert, neu ab ihrem Ende
+            end = start + timedelta(hours=1)
+            last = end if last is None else min(last, end)
+
+        if last is None:
+            return dt_util.utcnow() - timedelta(days=HISTORY_INITIAL_DAYS)
+        # Einträge bis einschließlich `since` werden übersprungen
+        return last - timedelta(microseconds=1)
+
+    def _async_add(self, imei, key, statistics):
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        if not statistics:
+            return
+        name, unit, _ = HISTORY_STATISTICS[key]
+        vehicle = self.coordinator.data.get(imei)
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=f"{vehicle.name if vehicle else imei} {name}",
+            source=DOMAIN,
+            statistic_id=statistic_id(imei, key),
+            unit_of_measurement=unit,
+        )
+        async_add_external_statistics(
+            self.hass, metadata, [StatisticData(**row) for row in statistics]
+        )
+        _LOGGER.debug(f"{len(statistics)} Stundenwerte {key} für {imei} importiert")
@@ -0,0 +1,118 @@
+"""Client-seitige Messwerte pro Endpoint (Anzahl, Latenz, Statuscodes, Bytes)."""
+from collections import Counter
+import math
+import time
+
+# Obergrenzen der Latenz-Buckets in Millisekunden (letzter Bucket: alles darüber)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf)
+
+
+class EndpointStats:
+    """Zähler und Latenz-Histogramm eines Endpoints."""
+
+    __slots__ = ("calls", "errors", "status", "buckets", "total_ms", "max_ms", "bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = Counter()
+        self.status = Counter()
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.bytes = 0
+
+    def observe(self, elapsed_ms):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, q):
+        """Obergrenze des Buckets, in dem das q-Quantil liegt (ms, höchstens max), oder None."""
+        if not self.calls:
+            return None
+        rank = math.ceil(q * self.calls)
+        seen = 0
+        for count, bound in zip(self.buckets, LATENCY_BUCKETS_MS):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max_ms), 1)
+        return round(self.max_ms, 1)
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": dict(self.errors),
+            "status": {str(code): count for code, count in self.status.items()},
+            "latency_ms": {
+                "mean": round(self.total_ms / self.calls, 1) if self.calls else None,
+                "p50": self.percentile(0.5),
+                "p95": self.percentile(0.95),
+                "max": round(self.max_ms, 1),
+                "histogram": {
+                    ("inf" if bound == math.inf else str(bound)): count
+                    for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)
+                },
+            },
+            "bytes": self.bytes,
+        }
+
+
+class ApiMetrics:
+    """Sammelt die Messwerte aller Requests eines EberspaecherAPI-Clients."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.relogins = 0
+        # Zweite (gehedgte) Requests, weil der erste länger als p95 brauchte
+        self.hedged = 0
+        self.started = time.time()
+
+    def _stats(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record(self, endpoint, status, elapsed, size):
+        """Ein beantworteter Request (elapsed in Sekunden, size in Bytes)."""
+        stats = self._stats(endpoint)
+        stats.observe(elapsed * 1000)
+        stats.status[status] += 1
+        stats.bytes += size
+
+    def record_error(self, endpoint, elapsed, error):
+        """Ein Request ohne Antwort (Timeout, Verbindungsfehler)."""
+        stats = self._stats(endpoint)
+        stats.observe(elapsed * 1000)
+        stats.errors[type(error).__name__] += 1
+
+    @property
+    def total_calls(self):
+        return sum(stats.calls for stats in self.endpoints.values())
+
+    @property
+    def total_errors(self):
+        total = 0
+        for stats in self.endpoints.values():
+            total += sum(stats.errors.values())
+            total += sum(count for code, count in stats.status.items() if code >= 400)
+        return total
+
+    @property
+    def total_bytes(self):
+        return sum(stats.bytes for stats in self.endpoints.values())
+
+    def as_dict(self):
+        return {
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_calls": self.total_calls,
+            "total_errors": self.total_errors,
+            "total_bytes": self.total_bytes,
+            "relogins": self.relogins,
+            "hedged": self.hedged,
+            "endpoints": {name: stats.as_dict() for name, stats in self.endpoints.items()},
+        }
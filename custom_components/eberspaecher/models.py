@@ -0,0 +1,150 @@
+"""Kompakte Datenmodelle für /calls und Heartbeat, einmal pro Snapshot geparst."""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from .const import HEATER_STATE_OFF
+
+
+def parse_timestamp(value):
+    """Zeitstempel der Cloud (ISO-String oder Epoch in s/ms) als aware datetime, oder None."""
+    if isinstance(value, (int, float)):
+        # Epoch in Millisekunden ist > 1e12
+        return datetime.fromtimestamp(value / 1000 if value > 1e12 else value, timezone.utc)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+@dataclass(slots=True, frozen=True)
+class Operation:
+    """currentOperation einer laufenden Heizung."""
+
+    mode: str | None
+    runtime: int | None
+    remaining_runtime: int
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            mode=data.get("operationMode"),
+            runtime=data.get("runtime"),
+            remaining_runtime=data.get("remainingRuntime") or 0,
+        )
+
+    def to_json(self):
+        return {
+            "operationMode": self.mode,
+            "runtime": self.runtime,
+            "remainingRuntime": self.remaining_runtime,
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class Heater:
+    """heaters[0] eines Fahrzeugs."""
+
+    state: str
+    temperature: float | None
+    operation: Operation | None
+
+    @classmethod
+    def from_json(cls, data):
+        # lastMeasuredTemperature ist meist {"temperature": x}, manchmal direkt der Wert
+        temp_data = data.get("lastMeasuredTemperature")
+        if isinstance(temp_data, dict):
+            temp_data = temp_data.get("temperature")
+        if not isinstance(temp_data, (int, float)):
+            temp_data = None
+
+        current_op = data.get("currentOperation")
+        return cls(
+            state=data.get("heaterState", HEATER_STATE_OFF),
+            temperature=temp_data,
+            operation=Operation.from_json(current_op) if isinstance(current_op, dict) else None,
+        )
+
+    def to_json(self):
+        return {
+            "heaterState": self.state,
+            "lastMeasuredTemperature": {"temperature": self.temperature},
+            "currentOperation": self.operation.to_json() if self.operation else None,
+        }
+
+    @property
+    def remaining_runtime(self):
+        return self.operation.remaining_runtime if self.operation else 0
+
+
+@dataclass(slots=True, frozen=True)
+class Vehicle:
+    """Ein Eintrag aus /calls."""
+
+    imei: str
+    name: str
+    heater: Heater | None
+
+    @classmethod
+    def from_json(cls, data):
+        heaters = data.get("heaters")
+        return cls(
+            imei=data["imei"],
+            name=data.get("name", "Eberspächer"),
+            heater=Heater.from_json(heaters[0]) if heaters else None,
+        )
+
+    def to_json(self):
+        """Im Format von /calls, damit from_json auch gespeicherte Snapshots liest."""
+        return {
+            "imei": self.imei,
+            "name": self.name,
+            "heaters": [self.heater.to_json()] if self.heater else [],
+        }
+
+    @property
+    def heater_state(self):
+        return self.heater.state if self.heater else None
+
+    @property
+    def is_active(self):
+        return self.heater is not None and self.heater.state != HEATER_STATE_OFF
+
+
+@dataclass(slots=True, frozen=True)
+class Heartbeat:
+    """Antwort von /heartbeat/{imei}/latest."""
+
+    voltage: int | None
+    rssi: int | None
+    timestamp: str | None
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            voltage=data.get("voltage"),
+            rssi=data.get("rssi"),
+            timestamp=data.get("timestamp"),
+        )
+
+    def to_json(self):
+        return {"voltage": self.voltage, "rssi": self.rssi, "timestamp": self.timestamp}
+
+    @property
+    def time(self):
+        return parse_timestamp(self.timestamp)
+
+    @property
+    def voltage_volts(self):
+        # Wert kommt in Millivolt (z.B. 12559 -> 12.56 V)
+        return round(self.voltage / 1000, 2) if self.voltage else None
+
+    @property
+    def rssi_dbm(self):
+        # Umrechnung von CSQ (0-31) in dBm: (CSQ * 2) - 113, z.B. 12 -> -89 dBm
+        if isinstance(self.rssi, int) and 0 <= self.rssi <= 31:
+            return (self.rssi * 2) - 113
+        # Falls schon dBm oder anderer Wert
+        return self.rssi
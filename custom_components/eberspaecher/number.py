@@ -10,22 +10,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     api = data["api"]
     settings = data["settings"]
 
-    devices = await api.get_devices()
+    # Geräte kommen aus dem gemeinsamen Snapshot des Coordinators
+    vehicles = data["coordinator"].data
     entities = []
 
-    for device in devices:
-        entities.append(EberspaecherRuntimeNumber(api, device, settings))
+    for vehicle in vehicles.values():
+        entities.append(EberspaecherRuntimeNumber(api, vehicle, settings))
 
     async_add_entities(entities)
 
 
 class EberspaecherRuntimeNumber(NumberEntity):
-    def __init__(self, api, device, settings):
+    def __init__(self, api, vehicle, settings):
         self._api = api
-        self._device = device
         self._settings = settings
-        self._imei = device.get("imei")
-        self._attr_name = f"{device.get('name', 'Eberspächer')} Laufzeit"
+        self._imei = vehicle.imei
+        self._attr_name = f"{vehicle.name} Laufzeit"
         self._attr_unique_id = f"{self._imei}_runtime_number"
 
         # Grenzen basierend auf deiner HAR Datei (10-120 Min)
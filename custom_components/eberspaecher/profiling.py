@@ -0,0 +1,116 @@
+"""Zeitlich begrenztes Profiling der Integration im Event-Loop (cProfile -> pstats/callgrind)."""
+import asyncio
+import cProfile
+import os
+import pstats
+
+try:
+    from pyprof2calltree import convert as convert_to_callgrind
+except ImportError:  # optional, ohne gibt es nur die pstats-Datei
+    convert_to_callgrind = None
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Module, deren Code zu "Entitäten" zählt
+ENTITY_MODULES = ("entity.py", "sensor.py", "switch.py", "select.py", "number.py")
+
+
+class LoopProfiler:
+    """cProfile für den Event-Loop-Thread, jeweils nur ein Lauf gleichzeitig."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+    async def async_record(self, seconds):
+        """Profil über `seconds` Sekunden aufnehmen (muss im Event-Loop laufen)."""
+        async with self._lock:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.disable()
+            return profiler
+
+
+def summarize(profiler, top=15):
+    """Zeit der Integration im Event-Loop nach Bereichen plus die teuersten Funktionen.
+
+    Zeiten in ms. "api", "entities" und "integration" sind eigene Rechenzeit
+    (ohne Warten auf das Netz), "json" und "state_writes" inkl. Unteraufrufe.
+    """
+    stats = pstats.Stats(profiler)
+    areas = {"integration": 0.0, "api": 0.0, "json": 0.0, "entities": 0.0, "state_writes": 0.0}
+    functions = []
+
+    for (filename, line, name), (_, calls, own, cumulative, callers) in stats.stats.items():
+        ours = filename.startswith(PACKAGE_DIR)
+        if ours:
+            module = os.path.basename(filename)
+            areas["integration"] += own
+            if module == "api.py":
+                areas["api"] += own
+            elif module in ENTITY_MODULES:
+                areas["entities"] += own
+            if name == "json_loads":
+                areas["json"] += cumulative
+            functions.append((own, cumulative, calls, f"{module}:{line}({name})"))
+        elif name == "async_write_ha_state":
+            # Nur die State-Writes, die von unseren Entitäten ausgelöst wurden
+            areas["state_writes"] += sum(
+                caller_stats[3]
+                for caller, caller_stats in callers.items()
+                if caller[0].startswith(PACKAGE_DIR)
+            )
+
+    functions.sort(reverse=True)
+    return {
+        "areas_ms": {area: round(seconds * 1000, 2) for area, seconds in areas.items()},
+        "top": [
+            {
+                "function": label,
+                "calls": calls,
+                "own_ms": round(own * 1000, 2),
+                "cumulative_ms": round(cumulative * 1000, 2),
+            }
+            for own, cumulative, calls, label in functions[:top]
+        ],
+    }
+
+
+def format_summary(summary, seconds):
+    lines = [f"Eberspächer Profil über {seconds:g} s (Rechenzeit im Event-Loop, ms)", ""]
+    lines += [f"{area:<14} {value:>10.2f}" for area, value in summary["areas_ms"].items()]
+    lines += ["", f"{'eigene ms':>10} {'kumuliert':>10} {'Aufrufe':>8}  Funktion"]
+    lines += [
+        f"{row['own_ms']:>10.2f} {row['cumulative_ms']:>10.2f} {row['calls']:>8}  {row['function']}"
+        for row in summary["top"]
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_profile(profiler, base_path, seconds):
+    """pstats-, callgrind- (falls pyprof2calltree installiert) und Text-Datei schreiben.
+
+    Blockiert (Dateizugriffe), daher im Executor aufrufen.
+    """
+    profiler.dump_stats(f"{base_path}.pstats")
+    callgrind = None
+    if convert_to_callgrind is not None:
+        callgrind = f"{base_path}.callgrind.out"
+        convert_to_callgrind(profiler.getstats(), callgrind)
+
+    summary = summarize(profiler)
+    with open(f"{base_path}.txt", "w", encoding="utf-8") as file:
+        file.write(format_summary(summary, seconds))
+
+    return {
+        "pstats": f"{base_path}.pstats",
+        "callgrind": callgrind,
+        "summary_file": f"{base_path}.txt",
+        **summary,
+    }
@@ -0,0 +1,148 @@
+"""Prozessweite Registry: ein API-Client pro Konto, eine Session und ein Request-Budget für alle."""
+import logging
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util.ssl import client_context
+
+from .api import DEFAULT_PAGE_SIZE, EberspaecherAPI
+from .const import (
+    CLIENT_RELEASE_GRACE_SECONDS,
+    DOMAIN,
+    GLOBAL_RATE_LIMIT_BURST,
+    GLOBAL_RATE_LIMIT_PER_SECOND,
+)
+from .resilience import TokenBucket
+from .transport import create_session
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_REGISTRY = f"{DOMAIN}_clients"
+
+
+@callback
+def async_get_registry(hass: HomeAssistant):
+    """Die Registry dieser Home-Assistant-Instanz (wird beim ersten Aufruf angelegt)."""
+    if DATA_REGISTRY not in hass.data:
+        hass.data[DATA_REGISTRY] = ClientRegistry(hass)
+    return hass.data[DATA_REGISTRY]
+
+
+class _Client:
+    """Ein Client mit Referenzzähler und ggf. geplantem Schließen."""
+
+    __slots__ = ("api", "password", "refs", "unsub_release")
+
+    def __init__(self, api, password):
+        self.api = api
+        self.password = password
+        self.refs = 0
+        self.unsub_release = None
+
+
+class ClientRegistry:
+    """Clients pro Konto (Benutzername), gemeinsame Session und gemeinsamer Rate Limiter.
+
+    Ein Client bleibt nach dem letzten Release noch CLIENT_RELEASE_GRACE_SECONDS
+    erhalten, damit ein Reload Token, Circuit Breaker und Metriken übernimmt.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._session = None
+        self._limiter = TokenBucket(GLOBAL_RATE_LIMIT_PER_SECOND, GLOBAL_RATE_LIMIT_BURST)
+        self._clients = {}
+        self._unsub_close = None
+
+    @staticmethod
+    def _key(username):
+        return username.strip().lower()
+
+    @property
+    def session(self):
+        """Gemeinsame Session (Connection Pool) aller Konten."""
+        if self._session is None or self._session.closed:
+            self._session = create_session(client_context())
+            if self._unsub_close is None:
+                self._unsub_close = self.hass.bus.async_listen_once(
+                    EVENT_HOMEASSISTANT_CLOSE, self._async_close_all
+                )
+        return self._session
+
+    @callback
+    def async_acquire(
+        self, username, password, token=None, on_token=None, page_size=DEFAULT_PAGE_SIZE, hedge=False
+    ):
+        """Client für das Konto holen bzw. anlegen und die Referenz zählen."""
+        key = self._key(username)
+        client = self._clients.get(key)
+        if client is not None and client.password != password:
+            # Passwort geändert: alten Client verwerfen
+            _LOGGER.debug(f"Zugangsdaten für {username} geändert, neuer Client")
+            self._cancel_release(client)
+            self._clients.pop(key)
+            client = None
+
+        if client is None:
+            api = EberspaecherAPI(
+                username,
+                password,
+                self.session,
+                token=token,
+                on_token=on_token,
+                page_size=page_size,
+                limiter=self._limiter,
+                hedge=hedge,
+            )
+            client = self._clients[key] = _Client(api, password)
+        else:
+            self._cancel_release(client)
+            client.api.configure(on_token=on_token, page_size=page_size, hedge=hedge)
+
+        client.refs += 1
+        return client.api
+
+    @callback
+    def async_release(self, username):
+        """Referenz freigeben; der letzte Release schließt den Client nach einer Karenzzeit."""
+        key = self._key(username)
+        client = self._clients.get(key)
+        if client is None:
+            return
+        client.refs = max(client.refs - 1, 0)
+        if client.refs or client.unsub_release is not None:
+            return
+
+        @callback
+        def _release(_now):
+            client.unsub_release = None
+            if client.refs == 0 and self._clients.get(key) is client:
+                self._clients.pop(key)
+                client.api.configure()
+                if not self._clients:
+                    self.hass.async_create_task(self._async_close_session())
+
+        client.unsub_release = async_call_later(self.hass, CLIENT_RELEASE_GRACE_SECONDS, _release)
+
+    @staticmethod
+    def _cancel_release(client):
+        if client.unsub_release is not None:
+            client.unsub_release()
+            client.unsub_release = None
+
+    async def _async_close_session(self):
+        if self._clients or self._session is None:
+            return
+        session, self._session = self._session, None
+        await session.close()
+
+    async def _async_close_all(self, _event):
+        """Beim Beenden von Home Assistant alles sofort schließen."""
+        self._unsub_close = None
+        for client in self._clients.values():
+            self._cancel_release(client)
+        self._clients.clear()
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
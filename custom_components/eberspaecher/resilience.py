@@ -0,0 +1,86 @@
+"""Rate Limiter, Backoff und Circuit Breaker für den Cloud-Client."""
+import asyncio
+import random
+import time
+
+
+class TokenBucket:
+    """Token-Bucket: im Mittel `rate` Requests pro Sekunde, Bursts bis `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wartet, bis ein Token frei ist (Reihenfolge bleibt erhalten)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+def backoff_delay(attempt, base, cap):
+    """Exponentielles Backoff mit Full Jitter (attempt beginnt bei 0)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Öffnet nach `threshold` Fehlern in Folge für `reset_timeout` Sekunden.
+
+    Offen: Requests schlagen sofort fehl. Danach darf ein einzelner
+    Probe-Request durch (half-open); Erfolg schließt, Fehler öffnet erneut.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold, reset_timeout):
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probe_running = False
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self._reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self):
+        """False, solange der Breaker offen ist (bzw. schon ein Probe-Request läuft)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_running:
+            self._probe_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._probe_running = False
+
+    def release_probe(self):
+        """Probe-Request ohne Ergebnis beendet (abgebrochen): nächster Request darf proben."""
+        self._probe_running = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._probe_running or self._failures >= self._threshold:
+            self._opened_at = time.monotonic()
+        self._probe_running = False
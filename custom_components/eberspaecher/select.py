@@ -19,23 +19,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     api = data["api"]
     settings = data["settings"]
 
-    # Wir brauchen die Geräte-ID (IMEI)
-    devices = await api.get_devices()
+    # Geräte-IDs (IMEI) kommen aus dem gemeinsamen Snapshot des Coordinators
+    vehicles = data["coordinator"].data
     entities = []
 
-    for device in devices:
-        entities.append(EberspaecherModeSelect(api, device, settings))
+    for vehicle in vehicles.values():
+        entities.append(EberspaecherModeSelect(api, vehicle, settings))
 
     async_add_entities(entities)
 
 
 class EberspaecherModeSelect(SelectEntity):
-    def __init__(self, api, device, settings):
+    def __init__(self, api, vehicle, settings):
         self._api = api
-        self._device = device
         self._settings = settings
-        self._imei = device.get("imei")
-        self._attr_name = f"{device.get('name', 'Eberspächer')} Modus"
+        self._imei = vehicle.imei
+        self._attr_name = f"{vehicle.name} Modus"
         self._attr_unique_id = f"{self._imei}_mode_select"
         self._attr_options = list(MODE_MAP.keys())  # ["Heizen", "Lüften"]
         self._attr_icon = "mdi:cog-transfer"
@@ -1,55 +1,138 @@
+import time
+
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.const import (
+    EntityCategory,
+    UnitOfInformation,
     UnitOfTemperature,
     UnitOfTime,
     UnitOfElectricPotential,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT
 )
-from .const import DOMAIN
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import (
+    BATTERY_DRAIN_MIN_VOLTS_PER_HOUR,
+    BATTERY_LOW_VOLTS,
+    DOMAIN,
+    FLEET_HEARTBEAT_STALE_SECONDS,
+    TREND_MIN_SAMPLES,
+)
+from .entity import EberspaecherEntity
+
+
+def _p95(endpoint):
+    def value(metrics):
+        stats = metrics.endpoints.get(endpoint)
+        return stats.percentile(0.95) if stats else None
+    return value
+
+
+# Diagnose-Sensoren für den API-Client: (Schlüssel, Name, Wert, Einheit, State-Class)
+API_SENSORS = (
+    ("api_requests", "API Requests", lambda m: m.total_calls, None, SensorStateClass.TOTAL_INCREASING),
+    ("api_errors", "API Fehler", lambda m: m.total_errors, None, SensorStateClass.TOTAL_INCREASING),
+    ("api_relogins", "API Re-Logins", lambda m: m.relogins, None, SensorStateClass.TOTAL_INCREASING),
+    ("api_hedged", "API gehedgte Requests", lambda m: m.hedged, None, SensorStateClass.TOTAL_INCREASING),
+    ("api_bytes", "API Datenvolumen", lambda m: m.total_bytes, UnitOfInformation.BYTES, SensorStateClass.TOTAL_INCREASING),
+    ("api_calls_p95", "API Latenz /calls p95", _p95("calls"), UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT),
+    ("api_heartbeat_p95", "API Latenz Heartbeat p95", _p95("heartbeat"), UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT),
+)
+
+
+def _rounded(value_fn, digits):
+    def value(trends):
+        result = value_fn(trends)
+        return round(result, digits) if result is not None else None
+    return value
+
+
+# Sensoren aus dem Ringpuffer: (Schlüssel, Name, Quelle, Wert, Einheit, Device-Class, Icon, standardmäßig aktiv)
+TREND_SENSORS = (
+    ("voltage_min", "Batteriespannung Minimum", "heartbeat", _rounded(lambda t: t.voltage.minimum, 2),
+     UnitOfElectricPotential.VOLT, SensorDeviceClass.VOLTAGE, "mdi:car-battery", False),
+    ("voltage_mean", "Batteriespannung Mittel", "heartbeat", _rounded(lambda t: t.voltage.mean, 2),
+     UnitOfElectricPotential.VOLT, SensorDeviceClass.VOLTAGE, "mdi:car-battery", False),
+    ("voltage_trend", "Batteriespannung Trend", "heartbeat", _rounded(lambda t: t.voltage.slope, 3),
+     "V/h", None, "mdi:chart-line", True),
+    ("battery_empty_in", "Batterie leer in", "heartbeat",
+     _rounded(lambda t: t.hours_until(BATTERY_LOW_VOLTS, TREND_MIN_SAMPLES, BATTERY_DRAIN_MIN_VOLTS_PER_HOUR), 1),
+     UnitOfTime.HOURS, SensorDeviceClass.DURATION, "mdi:battery-clock", True),
+    ("temperature_trend", "Temperatur Trend", "coordinator", _rounded(lambda t: t.temperature.slope, 2),
+     "°C/h", None, "mdi:thermometer-lines", False),
+)
+
+
+def _lowest_voltage(fleet):
+    lowest = fleet.lowest_voltage
+    return lowest[0] if lowest else None
+
+
+def _lowest_voltage_vehicle(fleet):
+    lowest = fleet.lowest_voltage
+    if lowest is None or lowest[1] is None:
+        return None
+    return {"vehicle": lowest[1].name}
+
+
+# Kontoweite Flotten-Sensoren: (Schlüssel, Name, Wert, Attribute, Einheit, Device-Class, Icon)
+FLEET_SENSORS = (
+    ("fleet_active", "Heizungen aktiv", lambda f: f.active_count, None,
+     None, None, "mdi:radiator"),
+    ("fleet_lowest_voltage", "Niedrigste Batteriespannung", _lowest_voltage, _lowest_voltage_vehicle,
+     UnitOfElectricPotential.VOLT, SensorDeviceClass.VOLTAGE, "mdi:car-battery"),
+    ("fleet_stale_heartbeats", "Fahrzeuge ohne aktuellen Heartbeat",
+     lambda f: f.stale_count(time.time(), FLEET_HEARTBEAT_STALE_SECONDS), None,
+     None, None, "mdi:heart-off"),
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Setup der Eberspächer Sensoren."""
     data = hass.data[DOMAIN][entry.entry_id]
     api = data["api"]
+    coordinator = data["coordinator"]
+    heartbeat = data["heartbeat"]
 
-    devices = await api.get_devices()
-    entities = []
-
-    for device in devices:
-        entities.append(EberspaecherTempSensor(api, device))
-        entities.append(EberspaecherStateSensor(api, device))
-        entities.append(EberspaecherRuntimeSensor(api, device))
-        entities.append(EberspaecherVoltageSensor(api, device))
-        entities.append(EberspaecherSignalSensor(api, device))
+    # Kontoweite Diagnose-Sensoren (standardmäßig deaktiviert)
+    entities = [
+        EberspaecherApiSensor(coordinator, entry.entry_id, api, *description)
+        for description in API_SENSORS
+    ]
 
-    async_add_entities(entities, True)
+    # Flotten-Kennzahlen aus den inkrementell gepflegten Indizes
+    entities.extend(
+        EberspaecherFleetSensor(coordinator, heartbeat, entry.entry_id, data["fleet"], *description)
+        for description in FLEET_SENSORS
+    )
 
+    # Geräte kommen aus dem gemeinsamen Snapshot, kein eigener /calls Request
+    for imei in coordinator.data:
+        entities.append(EberspaecherTempSensor(coordinator, imei))
+        entities.append(EberspaecherStateSensor(coordinator, imei))
+        entities.append(EberspaecherRuntimeSensor(coordinator, imei))
+        entities.append(EberspaecherVoltageSensor(coordinator, imei, heartbeat))
+        entities.append(EberspaecherSignalSensor(coordinator, imei, heartbeat))
+        for description in TREND_SENSORS:
+            entities.append(
+                EberspaecherTrendSensor(coordinator, imei, heartbeat, data["trends"], *description)
+            )
 
-class EberspaecherBaseSensor(SensorEntity):
-    """Basisklasse für alle Sensoren, hält API und Device-ID."""
+    async_add_entities(entities)
 
-    def __init__(self, api, device):
-        self._api = api
-        self._device = device
-        self._imei = device.get("imei")
-        self._name_prefix = device.get("name", "Eberspächer")
 
-    async def async_update(self):
-        """Standard-Update für Sensoren, die Daten aus der Hauptliste (/calls) holen."""
-        devices = await self._api.get_devices()
-        for dev in devices:
-            if dev.get("imei") == self._imei:
-                self._device = dev
+class EberspaecherBaseSensor(EberspaecherEntity, SensorEntity):
+    """Basisklasse für alle Sensoren, liest das Gerät aus dem Coordinator."""
 
 
 class EberspaecherTempSensor(EberspaecherBaseSensor):
     """Zeigt die gemessene Innenraumtemperatur an."""
 
-    def __init__(self, api, device):
-        super().__init__(api, device)
+    _fields = ("temperature",)
+
+    def __init__(self, coordinator, imei):
+        super().__init__(coordinator, imei)
         self._attr_unique_id = f"{self._imei}_temperature"
         self._attr_name = f"{self._name_prefix} Temperatur"
         self._attr_device_class = SensorDeviceClass.TEMPERATURE
@@ -58,40 +141,34 @@ class EberspaecherTempSensor(EberspaecherBaseSensor):
 
     @property
     def native_value(self):
-        # Pfad: heaters[0] -> lastMeasuredTemperature -> temperature
-        heaters = self._device.get("heaters", [{}])
-        if not heaters: return None
-
-        temp_data = heaters[0].get("lastMeasuredTemperature")
-        if isinstance(temp_data, dict):
-            return temp_data.get("temperature")
-        # Manchmal ist es auch direkt der Wert
-        if isinstance(temp_data, (int, float)):
-            return temp_data
-        return None
+        heater = self.heater
+        return heater.temperature if heater else None
 
 
 class EberspaecherStateSensor(EberspaecherBaseSensor):
     """Zeigt den aktuellen Status (HEATING, VENTILATION, OFF)."""
 
-    def __init__(self, api, device):
-        super().__init__(api, device)
+    _fields = ("heater_state",)
+
+    def __init__(self, coordinator, imei):
+        super().__init__(coordinator, imei)
         self._attr_unique_id = f"{self._imei}_status"
         self._attr_name = f"{self._name_prefix} Status"
         self._attr_icon = "mdi:list-status"
 
     @property
     def native_value(self):
-        heaters = self._device.get("heaters", [{}])
-        if not heaters: return "Unknown"
-        return heaters[0].get("heaterState", "OFF")
+        heater = self.heater
+        return heater.state if heater else "Unknown"
 
 
 class EberspaecherRuntimeSensor(EberspaecherBaseSensor):
     """Zeigt die verbleibende Laufzeit an, wenn die Heizung läuft."""
 
-    def __init__(self, api, device):
-        super().__init__(api, device)
+    _fields = ("remaining_runtime",)
+
+    def __init__(self, coordinator, imei):
+        super().__init__(coordinator, imei)
         self._attr_unique_id = f"{self._imei}_remaining_runtime"
         self._attr_name = f"{self._name_prefix} Restlaufzeit"
         self._attr_device_class = SensorDeviceClass.DURATION
@@ -100,20 +177,55 @@ class EberspaecherRuntimeSensor(EberspaecherBaseSensor):
 
     @property
     def native_value(self):
-        heaters = self._device.get("heaters", [{}])
-        if not heaters: return 0
+        heater = self.heater
+        return heater.remaining_runtime if heater else 0
+
+
+class EberspaecherHeartbeatSensor(EberspaecherBaseSensor):
+    """Basis für Sensoren, die ihre Daten vom Heartbeat statt von /calls holen."""
+
+    # Aus /calls zählt nur die Verfügbarkeit, die Werte kommen vom Heartbeat
+    _fields = ()
+    _heartbeat_fields = ()
+
+    def __init__(self, coordinator, imei, heartbeat):
+        super().__init__(coordinator, imei)
+        self._heartbeat = heartbeat
+
+    async def async_added_to_hass(self):
+        """Zusätzlich auf den Heartbeat-Coordinator hören."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._heartbeat.async_add_listener(self._handle_heartbeat_update)
+        )
+
+    @callback
+    def _handle_heartbeat_update(self):
+        if self._needs_write(self._heartbeat, self._heartbeat_fields):
+            self.async_write_ha_state()
+
+    @property
+    def heartbeat(self):
+        """Letzter Heartbeat (Heartbeat) dieses Fahrzeugs, oder None."""
+        return (self._heartbeat.data or {}).get(self._imei)
+
+    @property
+    def restored(self):
+        return self._heartbeat.restored
+
+    @property
+    def available(self):
+        heartbeat_ok = self._heartbeat.last_update_success or self._heartbeat.restored
+        return super().available and heartbeat_ok and self._imei in (self._heartbeat.data or {})
 
-        current_op = heaters[0].get("currentOperation")
-        if isinstance(current_op, dict):
-            return current_op.get("remainingRuntime", 0)
-        return 0
 
+class EberspaecherVoltageSensor(EberspaecherHeartbeatSensor):
+    """Zeigt die Batteriespannung (Daten vom Heartbeat)."""
 
-class EberspaecherVoltageSensor(EberspaecherBaseSensor):
-    """Zeigt die Batteriespannung (holt Daten vom Heartbeat)."""
+    _heartbeat_fields = ("voltage",)
 
-    def __init__(self, api, device):
-        super().__init__(api, device)
+    def __init__(self, coordinator, imei, heartbeat):
+        super().__init__(coordinator, imei, heartbeat)
         self._attr_unique_id = f"{self._imei}_voltage"
         self._attr_name = f"{self._name_prefix} Batteriespannung"
         self._attr_device_class = SensorDeviceClass.VOLTAGE
@@ -121,21 +233,19 @@ class EberspaecherVoltageSensor(EberspaecherBaseSensor):
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_icon = "mdi:car-battery"
 
-    async def async_update(self):
-        """Spezial-Update: Ruft get_diagnostics (Heartbeat) auf."""
-        diag = await self._api.get_diagnostics(self._imei)
-        if diag and "voltage" in diag:
-            # Wert kommt in Millivolt (z.B. 12559 -> 12.56 V)
-            val = diag["voltage"]
-            if val:
-                self._attr_native_value = round(val / 1000, 2)
+    @property
+    def native_value(self):
+        heartbeat = self.heartbeat
+        return heartbeat.voltage_volts if heartbeat else None
 
 
-class EberspaecherSignalSensor(EberspaecherBaseSensor):
+class EberspaecherSignalSensor(EberspaecherHeartbeatSensor):
     """Zeigt die GSM-Signalstärke an."""
 
-    def __init__(self, api, device):
-        super().__init__(api, device)
+    _heartbeat_fields = ("rssi",)
+
+    def __init__(self, coordinator, imei, heartbeat):
+        super().__init__(coordinator, imei, heartbeat)
         self._attr_unique_id = f"{self._imei}_rssi"
         self._attr_name = f"{self._name_prefix} Signalstärke"
         self._attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
@@ -143,16 +253,122 @@ class EberspaecherSignalSensor(EberspaecherBaseSensor):
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_icon = "mdi:signal"
 
-    async def async_update(self):
-        """Spezial-Update: Ruft get_diagnostics (Heartbeat) auf."""
-        diag = await self._api.get_diagnostics(self._imei)
-        if diag and "rssi" in diag:
-            csq = diag["rssi"]
-            # Umrechnung von CSQ (0-31) in dBm
-            # Formel: (CSQ * 2) - 113
-            # Beispiel: 12 -> -89 dBm
-            if isinstance(csq, int) and 0 <= csq <= 31:
-                self._attr_native_value = (csq * 2) - 113
-            else:
-                # Falls schon dBm oder anderer Wert
-                self._attr_native_value = csq
\ No newline at end of file
+    @property
+    def native_value(self):
+        heartbeat = self.heartbeat
+        return heartbeat.rssi_dbm if heartbeat else None
+
+
+class EberspaecherTrendSensor(EberspaecherBaseSensor):
+    """Minimum, Mittelwert oder Trend aus dem Ringpuffer des Fahrzeugs (ohne Recorder-Abfragen)."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _fields = ()
+
+    def __init__(self, coordinator, imei, heartbeat, trends, key, name, source, value_fn, unit, device_class, icon, enabled):
+        super().__init__(coordinator, imei)
+        # Heartbeat-Werte ändern sich mit dem Heartbeat, Temperaturen mit /calls
+        self._source = heartbeat if source == "heartbeat" else coordinator
+        self._trends = trends
+        self._value_fn = value_fn
+        self._last_value = None
+        self._attr_unique_id = f"{self._imei}_{key}"
+        self._attr_name = f"{self._name_prefix} {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_icon = icon
+        self._attr_entity_registry_enabled_default = enabled
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        if self._source is not self.coordinator:
+            self.async_on_remove(self._source.async_add_listener(self._handle_source_update))
+
+    @callback
+    def _handle_coordinator_update(self):
+        if self._source is self.coordinator:
+            self._handle_source_update()
+        elif self._needs_write(self.coordinator, ()):
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_source_update(self):
+        status_changed = self._needs_write(self.coordinator, ())
+        value = self.native_value
+        if status_changed or value != self._last_value:
+            self._last_value = value
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        trends = self._trends.get(self._imei)
+        return self._value_fn(trends) if trends else None
+
+
+class EberspaecherApiSensor(CoordinatorEntity, SensorEntity):
+    """Messwert des API-Clients (Requests, Fehler, Latenz), pro Konto."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_icon = "mdi:cloud-sync"
+
+    def __init__(self, coordinator, entry_id, api, key, name, value_fn, unit, state_class):
+        super().__init__(coordinator)
+        self._api = api
+        self._value_fn = value_fn
+        self._attr_unique_id = f"{entry_id}_{key}"
+        self._attr_name = f"Eberspächer {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+
+    @property
+    def available(self):
+        # Messwerte gibt es auch (gerade) dann, wenn die Cloud gestört ist
+        return True
+
+    @property
+    def native_value(self):
+        return self._value_fn(self._api.metrics)
+
+
+class EberspaecherFleetSensor(CoordinatorEntity, SensorEntity):
+    """Kennzahl über alle Fahrzeuge des Kontos (aktive Heizungen, Spannung, Heartbeats)."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, heartbeat, entry_id, fleet, key, name, value_fn, attributes_fn, unit, device_class, icon):
+        super().__init__(coordinator)
+        self._heartbeat = heartbeat
+        self._fleet = fleet
+        self._value_fn = value_fn
+        self._attributes_fn = attributes_fn
+        self._last_state = None
+        self._attr_unique_id = f"{entry_id}_{key}"
+        self._attr_name = f"Eberspächer {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_icon = icon
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.async_on_remove(self._heartbeat.async_add_listener(self._handle_coordinator_update))
+
+    @callback
+    def _handle_coordinator_update(self):
+        # Nur schreiben, wenn sich Wert, Attribute oder Verfügbarkeit geändert haben
+        state = (self.available, self.native_value, self.extra_state_attributes)
+        if state != self._last_state:
+            self._last_state = state
+            self.async_write_ha_state()
+
+    @property
+    def available(self):
+        return super().available or self.coordinator.restored
+
+    @property
+    def native_value(self):
+        return self._value_fn(self._fleet)
+
+    @property
+    def extra_state_attributes(self):
+        return self._attributes_fn(self._fleet) if self._attributes_fn else None
@@ -0,0 +1,149 @@
+"""Services der Integration (z.B. mehrere Heizungen auf einmal schalten)."""
+import asyncio
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DEFAULT_RUNTIME, DOMAIN, MODE_HEATING, MODE_OFF, MODE_VENTILATION
+from .profiling import LoopProfiler, write_profile
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SET_STATE_BULK = "set_state_bulk"
+SERVICE_PROFILE = "profile"
+
+ATTR_VEHICLES = "vehicles"
+ATTR_MODE = "mode"
+ATTR_RUNTIME = "runtime"
+ALL_VEHICLES = "all"
+ATTR_SECONDS = "seconds"
+
+SET_STATE_BULK_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_VEHICLES, default=ALL_VEHICLES): vol.Any(
+            ALL_VEHICLES, vol.All(cv.ensure_list, [cv.string])
+        ),
+        vol.Required(ATTR_MODE): vol.In([MODE_HEATING, MODE_VENTILATION, MODE_OFF]),
+        vol.Optional(ATTR_RUNTIME, default=DEFAULT_RUNTIME): vol.All(
+            vol.Coerce(int), vol.Range(min=10, max=120)
+        ),
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SECONDS, default=60): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=600)
+        ),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant):
+    """Services einmalig für alle Konten registrieren."""
+
+    async def async_set_state_bulk(call: ServiceCall):
+        return await _async_set_state_bulk(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_STATE_BULK,
+        async_set_state_bulk,
+        schema=SET_STATE_BULK_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    profiler = LoopProfiler()
+
+    async def async_profile(call: ServiceCall):
+        return await _async_profile(hass, profiler, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def _async_set_state_bulk(hass: HomeAssistant, call: ServiceCall):
+    """Befehl an alle gewählten Fahrzeuge (IMEI oder Name) aller Konten gleichzeitig senden."""
+    mode = call.data[ATTR_MODE]
+    runtime = call.data[ATTR_RUNTIME]
+    wanted = call.data[ATTR_VEHICLES]
+    if wanted != ALL_VEHICLES:
+        # casefold -> Angabe wie übergeben, für die Meldung nicht gefundener Fahrzeuge
+        wanted = {vehicle.strip().casefold(): vehicle.strip() for vehicle in wanted}
+    matched = set()
+
+    # Fahrzeuge pro Konto sammeln, damit jedes Konto seine eigene Warteschlange nutzt
+    batches = []
+    names = {}
+    for data in hass.data.get(DOMAIN, {}).values():
+        commands = {}
+        for imei, vehicle in (data["coordinator"].data or {}).items():
+            keys = {imei.casefold(), vehicle.name.casefold()}
+            if wanted == ALL_VEHICLES or not keys.isdisjoint(wanted):
+                commands[imei] = (mode, runtime)
+                names[imei] = vehicle.name
+                matched |= keys
+        if commands:
+            batches.append((data, commands))
+
+    if not batches:
+        raise HomeAssistantError(f"Keine passenden Fahrzeuge gefunden: {call.data[ATTR_VEHICLES]}")
+    not_found = [] if wanted == ALL_VEHICLES else [
+        identifier for key, identifier in wanted.items() if key not in matched
+    ]
+
+    outcomes = await asyncio.gather(
+        *(data["commands"].async_set_state_bulk(commands) for data, commands in batches)
+    )
+
+    results = {}
+    for (data, _), outcome in zip(batches, outcomes):
+        results.update(outcome)
+        for imei, ok in outcome.items():
+            if ok:
+                # Nur die geschalteten Fahrzeuge kurz nachfragen statt die ganze Flotte
+                data["coordinator"].async_confirm(imei, mode != MODE_OFF)
+
+    failed = [imei for imei, ok in results.items() if not ok]
+    if failed:
+        _LOGGER.warning(f"{SERVICE_SET_STATE_BULK}: {len(failed)} von {len(results)} Fahrzeugen fehlgeschlagen: {failed}")
+    if not_found:
+        _LOGGER.warning(f"{SERVICE_SET_STATE_BULK}: Fahrzeuge nicht gefunden: {not_found}")
+
+    return {
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed) + len(not_found),
+        "results": {
+            imei: {"name": names[imei], "success": ok} for imei, ok in results.items()
+        },
+        "not_found": not_found,
+    }
+
+
+async def _async_profile(hass: HomeAssistant, profiler: LoopProfiler, call: ServiceCall):
+    """Event-Loop für `seconds` Sekunden profilen und die Dateien im Konfigurationsordner ablegen."""
+    if profiler.running:
+        raise HomeAssistantError("Es läuft bereits ein Profil")
+
+    seconds = call.data[ATTR_SECONDS]
+    _LOGGER.info(f"Profil für {seconds:g} s gestartet")
+    profile = await profiler.async_record(seconds)
+
+    base_path = hass.config.path(f"{DOMAIN}_profile_{dt_util.now():%Y%m%d_%H%M%S}")
+    result = await hass.async_add_executor_job(write_profile, profile, base_path, seconds)
+    _LOGGER.info(
+        f"Profil geschrieben: {result['pstats']} (Integration {result['areas_ms']['integration']} ms, "
+        f"Zusammenfassung in {result['summary_file']})"
+    )
+    return result
@@ -0,0 +1,41 @@
+"""Persistenter Speicher pro Config Entry (Auth-Token, letzter Snapshot)."""
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, STORAGE_SAVE_DELAY, STORAGE_VERSION
+
+
+class EberspaecherStorage:
+    """Hält die gespeicherten Daten eines Kontos in .storage/eberspaecher.<entry_id>."""
+
+    def __init__(self, hass: HomeAssistant, entry_id):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._data = {}
+
+    async def async_load(self):
+        self._data = await self._store.async_load() or {}
+
+    @property
+    def token(self):
+        return self._data.get("token")
+
+    @callback
+    def async_set_token(self, token):
+        """Wird von der API nach jedem Login aufgerufen."""
+        if token == self._data.get("token"):
+            return
+        self._data["token"] = token
+        self._store.async_delay_save(lambda: self._data, STORAGE_SAVE_DELAY)
+
+    def snapshot(self, key):
+        """Letzter guter Stand ("devices" oder "heartbeats"), IMEI -> Rohdaten."""
+        return self._data.get("snapshot", {}).get(key)
+
+    @callback
+    def async_set_snapshot(self, key, data):
+        """Snapshot merken; gespeichert wird verzögert und zusammengefasst."""
+        self._data.setdefault("snapshot", {})[key] = data
+        self._store.async_delay_save(lambda: self._data, SNAPSHOT_SAVE_DELAY)
+
+    async def async_remove(self):
+        await self._store.async_remove()
@@ -1,36 +1,39 @@
-from datetime import timedelta
 import logging
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from .const import DOMAIN
+from .entity import EberspaecherEntity
 
 _LOGGER = logging.getLogger(__name__)
-SCAN_INTERVAL = timedelta(seconds=60)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Setup Switch."""
     data = hass.data[DOMAIN][entry.entry_id]
-    api = data["api"]
+    coordinator = data["coordinator"]
+    commands = data["commands"]
     settings = data["settings"]
 
-    devices = await api.get_devices()
     entities = []
-    for dev in devices:
-        entities.append(EberspaecherSwitch(api, dev, settings))
+    for imei in coordinator.data:
+        entities.append(EberspaecherSwitch(coordinator, imei, commands, settings))
 
-    async_add_entities(entities, True)
+    async_add_entities(entities)
 
 
-class EberspaecherSwitch(SwitchEntity):
-    def __init__(self, api, device, settings):
-        self._api = api
-        self._device = device
+class EberspaecherSwitch(EberspaecherEntity, SwitchEntity):
+    _fields = ("heater_state",)
+
+    def __init__(self, coordinator, imei, commands, settings):
+        super().__init__(coordinator, imei)
+        self._commands = commands
         self._settings = settings  # Zugriff auf die globalen Settings
-        self._id = device.get("imei")
-        self._name = f"{device.get('name', 'Eberspächer')} Heizung"
-        self._is_on = False
+        self._id = imei
+        self._name = f"{self._name_prefix} Heizung"
+        self._is_on = self._state_from_device()
+        # Laufende Befehle: optimistischen Zustand nicht vom Snapshot überschreiben
+        self._commands_in_flight = 0
 
     @property
     def name(self):
@@ -53,19 +56,24 @@ class EberspaecherSwitch(SwitchEntity):
             return "mdi:radiator"
         return "mdi:radiator-off"
 
-    async def async_update(self):
-        """Status prüfen."""
-        devices = await self._api.get_devices()
-        for dev in devices:
-            if dev.get("imei") == self._id:
-                # Wir prüfen heaterState oder heaters[0].heaterState
-                # Pass das hier an deine JSON Struktur an!
-                heaters = dev.get("heaters", [{}])
-                heater = heaters[0] if heaters else {}
-                state = heater.get("heaterState", "OFF")
-
-                # Prüfen ob an (HEATING, VENTILATION, etc.)
-                self._is_on = state not in ["OFF", "DEACTIVATION_REQUESTED"]
+    def _state_from_device(self):
+        """Liest den Heizungsstatus aus dem Snapshot."""
+        heater = self.heater
+        state = heater.state if heater else "OFF"
+
+        # Prüfen ob an (HEATING, VENTILATION, etc.)
+        return state not in ["OFF", "DEACTIVATION_REQUESTED"]
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Status aus dem neuen Snapshot übernehmen, nur bei Änderung schreiben."""
+        if self._commands_in_flight:
+            return
+        is_on = self._state_from_device()
+        # Auch schreiben, wenn der optimistische Zustand nicht bestätigt wurde
+        if self._needs_write(self.coordinator, self._fields) or is_on != self._is_on:
+            self._is_on = is_on
+            self.async_write_ha_state()
 
     async def async_turn_on(self, **kwargs):
         """Einschalten mit den gewählten Settings."""
@@ -74,15 +82,26 @@ class EberspaecherSwitch(SwitchEntity):
         runtime = self._settings.get("runtime", 30)
 
         _LOGGER.info(f"Starte Standheizung: Modus={mode}, Zeit={runtime}m")
-
-        success = await self._api.set_state(self._id, mode, runtime=runtime)
-        if success:
-            self._is_on = True
-            self.async_write_ha_state()
+        await self._async_send(True, mode, runtime)
 
     async def async_turn_off(self, **kwargs):
         """Ausschalten."""
-        success = await self._api.set_state(self._id, "OFF")
-        if success:
-            self._is_on = False
-            self.async_write_ha_state()
\ No newline at end of file
+        await self._async_send(False, "OFF")
+
+    async def _async_send(self, is_on, mode, runtime=30):
+        """Optimistisch schalten, Befehl über die Warteschlange senden."""
+        self._is_on = is_on
+        self.async_write_ha_state()
+
+        self._commands_in_flight += 1
+        try:
+            success = await self._commands.async_set_state(self._id, mode, runtime=runtime)
+        finally:
+            self._commands_in_flight -= 1
+        if success and not self._commands_in_flight:
+            # Bestätigten Zustand in Sekunden statt erst beim nächsten Poll
+            self.coordinator.async_confirm(self._id, is_on)
+        elif not success and not self._commands_in_flight:
+            # Zurück auf den zuletzt bestätigten Zustand aus dem Snapshot
+            self._is_on = self._state_from_device()
+            self.async_write_ha_state()
@@ -0,0 +1,39 @@
+"""Eigener HTTP-Transport für die Eberspächer Cloud (Keep-Alive, DNS-Cache, schnelles JSON)."""
+import json
+
+import aiohttp
+
+try:
+    import orjson
+except ImportError:  # orjson ist optional, json aus der Standardbibliothek reicht auch
+    orjson = None
+
+# Verbindungen zur Cloud offen halten statt pro Poll neu aufzubauen
+CONNECTION_LIMIT = 20
+CONNECTION_LIMIT_PER_HOST = 10
+KEEPALIVE_TIMEOUT_SECONDS = 60
+DNS_CACHE_TTL_SECONDS = 300
+# Obergrenze für einen kompletten Request, falls nichts Genaueres gesetzt ist
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+def create_session(ssl_context=None):
+    """ClientSession mit eigenem Connector; der Aufrufer muss sie wieder schließen."""
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS,
+        ttl_dns_cache=DNS_CACHE_TTL_SECONDS,
+        ssl=ssl_context if ssl_context is not None else True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT_SECONDS),
+    )
+
+
+def json_loads(body):
+    """JSON aus Bytes dekodieren, mit orjson falls vorhanden."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
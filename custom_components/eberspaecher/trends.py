@@ -0,0 +1,138 @@
+"""Ringpuffer der letzten Messwerte pro Fahrzeug mit laufendem Minimum, Mittelwert und Trend."""
+from array import array
+from collections import deque
+
+SECONDS_PER_HOUR = 3600
+
+
+class RollingWindow:
+    """Ringpuffer fester Größe (array('d')) für (Zeit, Wert)-Paare.
+
+    Summen für Mittelwert und lineare Regression sowie eine monotone Queue
+    fürs Minimum werden beim Einfügen nachgeführt: O(1) pro Messwert
+    (amortisiert), Abfragen ohne Schleife über den Puffer.
+    """
+
+    __slots__ = (
+        "_capacity", "_times", "_values", "_seq", "_count", "_origin",
+        "_sum_t", "_sum_v", "_sum_tt", "_sum_tv", "_minima",
+    )
+
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Laufende Nummer des nächsten Eintrags, Index = seq % capacity
+        self._seq = 0
+        self._count = 0
+        # Zeiten relativ zum ersten Messwert in Stunden, damit die Summen klein bleiben
+        self._origin = None
+        self._sum_t = 0.0
+        self._sum_v = 0.0
+        self._sum_tt = 0.0
+        self._sum_tv = 0.0
+        # Laufende Nummern mit aufsteigenden Werten, vorne das Minimum
+        self._minima = deque()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value):
+        """Messwert (Zeit in Sekunden seit Epoch) einfügen, ältester fällt ggf. heraus."""
+        if self._origin is None:
+            self._origin = timestamp
+        t = (timestamp - self._origin) / SECONDS_PER_HOUR
+
+        if self._count == self._capacity:
+            oldest = self._seq - self._capacity
+            index = oldest % self._capacity
+            old_t, old_v = self._times[index], self._values[index]
+            self._sum_t -= old_t
+            self._sum_v -= old_v
+            self._sum_tt -= old_t * old_t
+            self._sum_tv -= old_t * old_v
+            if self._minima and self._minima[0] == oldest:
+                self._minima.popleft()
+        else:
+            self._count += 1
+
+        index = self._seq % self._capacity
+        self._times[index] = t
+        self._values[index] = value
+        self._sum_t += t
+        self._sum_v += value
+        self._sum_tt += t * t
+        self._sum_tv += t * value
+
+        while self._minima and self._values[self._minima[-1] % self._capacity] >= value:
+            self._minima.pop()
+        self._minima.append(self._seq)
+        self._seq += 1
+
+    @property
+    def latest(self):
+        if not self._count:
+            return None
+        return self._values[(self._seq - 1) % self._capacity]
+
+    @property
+    def minimum(self):
+        if not self._minima:
+            return None
+        return self._values[self._minima[0] % self._capacity]
+
+    @property
+    def mean(self):
+        if not self._count:
+            return None
+        return self._sum_v / self._count
+
+    @property
+    def slope(self):
+        """Steigung der Regressionsgeraden pro Stunde, None bei weniger als zwei Zeitpunkten."""
+        n = self._count
+        denominator = n * self._sum_tt - self._sum_t * self._sum_t
+        if n < 2 or denominator <= 1e-12:
+            return None
+        return (n * self._sum_tv - self._sum_t * self._sum_v) / denominator
+
+
+class VehicleTrends:
+    """Spannungs- und Temperaturverlauf eines Fahrzeugs."""
+
+    __slots__ = ("voltage", "temperature", "_last_heartbeat", "_last_heater")
+
+    def __init__(self, capacity):
+        self.voltage = RollingWindow(capacity)
+        self.temperature = RollingWindow(capacity)
+        self._last_heartbeat = None
+        self._last_heater = None
+
+    def add_temperature(self, timestamp, heater):
+        """Temperatur übernehmen; dasselbe Heater-Objekt (Snapshot ohne neuen Abruf) zählt nur einmal."""
+        if heater is self._last_heater or heater is None or heater.temperature is None:
+            return False
+        self._last_heater = heater
+        self.temperature.append(timestamp, heater.temperature)
+        return True
+
+    def add_voltage(self, timestamp, volts, heartbeat_time=None):
+        """Spannung übernehmen; derselbe Heartbeat (gleicher Zeitstempel) zählt nur einmal."""
+        if heartbeat_time is not None:
+            if heartbeat_time == self._last_heartbeat:
+                return False
+            self._last_heartbeat = heartbeat_time
+        self.voltage.append(timestamp, volts)
+        return True
+
+    def hours_until(self, volts, min_samples, min_drain):
+        """Geschätzte Stunden, bis die Spannung `volts` erreicht.
+
+        None, solange zu wenig Messwerte da sind oder die Spannung nicht
+        schneller als `min_drain` V/h fällt.
+        """
+        slope = self.voltage.slope
+        latest = self.voltage.latest
+        if len(self.voltage) < min_samples or slope is None or slope > -min_drain:
+            return None
+        return max(latest - volts, 0.0) / -slope
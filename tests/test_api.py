@@ -0,0 +1,155 @@
+"""Tests für den Cloud-Client (api.py, ohne Home Assistant und ohne Netzwerk)."""
+import asyncio
+import json
+
+import pytest
+
+from bench import load_integration_module
+
+api_module = load_integration_module("api")
+resilience = load_integration_module("resilience")
+
+IMEI = "860000000000000"
+DEVICE = {"imei": IMEI, "name": "Fahrzeug 1", "heaters": [{"heaterState": "OFF"}]}
+
+
+def page(*devices):
+    return json.dumps({"content": list(devices), "totalPages": 1}).encode()
+
+
+class FakeSend:
+    """Ersetzt _send_once; `handler(url, params)` liefert (Status, Body) oder wirft."""
+
+    def __init__(self, handler):
+        self._handler = handler
+        self.calls = []
+
+    async def __call__(self, endpoint, method, url, **kwargs):
+        params = kwargs.get("params") or {}
+        self.calls.append(params.get("fetchHeater"))
+        return await self._handler(url, params)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(api_module, "backoff_delay", lambda attempt, base, cap: 0)
+
+
+def make_api(handler, **kwargs):
+    api = api_module.EberspaecherAPI(
+        "test@example.com", "test", session=None, token="token",
+        limiter=resilience.TokenBucket(1000, 1000), **kwargs,
+    )
+    api._send_once = FakeSend(handler)
+    return api
+
+
+def lean_rejected_with(status=None, error=None):
+    async def handler(url, params):
+        if params["fetchHeater"] == api_module.FETCH_HEATER_LEAN:
+            if error is not None:
+                raise error
+            return status, b"nope"
+        return 200, page(DEVICE)
+    return handler
+
+
+@pytest.mark.parametrize("status", [400, 404])
+def test_lean_disabled_when_cloud_rejects_it(status):
+    async def run():
+        api = make_api(lean_rejected_with(status))
+        assert await api.get_devices(full=False) == [DEVICE]
+        assert not api._lean_supported
+        api._send_once.calls.clear()
+        await api.get_devices(full=False)
+        assert api._send_once.calls == [api_module.FETCH_HEATER_FULL]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("status, error", [(503, None), (None, asyncio.TimeoutError())])
+def test_lean_kept_after_transient_error(status, error):
+    async def run():
+        api = make_api(lean_rejected_with(status, error))
+        # Nur dieser Abruf scheitert, ohne auf FULL umzusteigen
+        assert await api.get_devices(full=False) == []
+        assert api._lean_supported
+        assert set(api._send_once.calls) == {api_module.FETCH_HEATER_LEAN}
+
+    asyncio.run(run())
+
+
+def test_concurrent_reads_share_one_request():
+    async def handler(url, params):
+        await asyncio.sleep(0.01)
+        return 200, page(DEVICE)
+
+    async def run():
+        api = make_api(handler)
+        results = await asyncio.gather(*(api.get_devices() for _ in range(10)))
+        assert results == [[DEVICE]] * 10
+        assert len(api._send_once.calls) == 1
+        assert not api._inflight
+
+    asyncio.run(run())
+
+
+def test_coalesced_error_reaches_every_waiter_and_is_not_cached():
+    fetches = []
+
+    async def failing():
+        fetches.append(1)
+        await asyncio.sleep(0.01)
+        raise api_module.EberspaecherAPIError("kaputt", 500)
+
+    async def succeeding():
+        fetches.append(1)
+        return [DEVICE]
+
+    async def run():
+        api = make_api(None, cache_ttl=60)
+        results = await asyncio.gather(
+            *(api._coalesce(("devices", "FULL"), failing) for _ in range(5)),
+            return_exceptions=True,
+        )
+        assert len(fetches) == 1
+        assert all(isinstance(r, api_module.EberspaecherAPIError) for r in results)
+        assert not api._inflight and not api._cache
+
+        # Der nächste Aufruf fragt neu, statt den Fehler aus dem Cache zu liefern
+        assert await api._coalesce(("devices", "FULL"), succeeding) == [DEVICE]
+        assert len(fetches) == 2
+        # ... und erst das Ergebnis wird gecacht
+        assert await api._coalesce(("devices", "FULL"), failing) == [DEVICE]
+        assert len(fetches) == 2
+
+    asyncio.run(run())
+
+
+def test_history_404_skips_only_that_vehicle():
+    async def handler(url, params):
+        if url.endswith("/heartbeat/unknown"):
+            return 404, b"not found"
+        return 200, json.dumps({"content": [{"timestamp": "2024-01-01T00:00:00Z", "voltage": 12500}]}).encode()
+
+    async def run():
+        api = make_api(handler)
+        assert await api.get_heartbeat_history("unknown") == []
+        assert await api.get_heartbeat_history("unknown") == []
+        assert len(api._send_once.calls) == 1
+        assert len(await api.get_heartbeat_history(IMEI)) == 1
+
+    asyncio.run(run())
+
+
+def test_history_405_disables_the_endpoint():
+    async def handler(url, params):
+        return 405, b"method not allowed"
+
+    async def run():
+        api = make_api(handler)
+        assert await api.get_heartbeat_history(IMEI) == []
+        assert await api.get_heartbeat_history("other") == []
+        assert len(api._send_once.calls) == 1
+
+    asyncio.run(run())
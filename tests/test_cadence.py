@@ -0,0 +1,127 @@
+"""Tests für den gelernten Heartbeat-Takt (cadence.py, ohne Home Assistant)."""
+import random
+
+from bench import load_integration_module
+
+cadence_module = load_integration_module("cadence")
+
+BASE = 60
+GRACE = 30
+MAX_SKIP = 3600
+MIN_INTERVAL = 15
+TOLERANCE = 2
+
+
+def make_cadence():
+    return cadence_module.HeartbeatCadence(BASE, GRACE, MAX_SKIP, MIN_INTERVAL, TOLERANCE)
+
+
+def simulate(period, hours, seed=1):
+    """Fahrzeug mit festem Heartbeat-Takt, abgefragt wie vom Heartbeat-Coordinator.
+
+    HA startet Refreshes bis zu 1 s zu früh. Gibt (Cadence, Abrufe, größte
+    Verspätung eines neuen Heartbeats in Sekunden) zurück.
+    """
+    rng = random.Random(seed)
+    cadence = make_cadence()
+    fetches = 0
+    max_lag = 0.0
+    seen = None
+    next_run = 0.0
+    now = 0.0
+    while now < hours * 3600:
+        if now >= next_run:
+            if cadence.is_due(now):
+                fetches += 1
+                seen = (now // period) * period
+                cadence.observe(seen, now)
+            delay = min(max(cadence.next_fetch() - now, MIN_INTERVAL), BASE)
+            next_run = now + int(delay) - rng.uniform(0, 1)
+        if seen is not None and (now // period) * period != seen:
+            max_lag = max(max_lag, now - (seen + period))
+        now += 0.5
+    return cadence, fetches, max_lag
+
+
+def test_first_fetch_is_due_immediately():
+    cadence = make_cadence()
+    assert cadence.next_fetch() == 0.0
+    assert cadence.is_due(0.0)
+
+
+def test_unknown_cadence_uses_base_interval():
+    cadence = make_cadence()
+    assert cadence.observe(1000.0, 1005.0)
+    assert cadence.cadence is None
+    assert cadence.next_fetch() == 1005.0 + BASE
+
+
+def test_gap_between_own_fetches_is_not_learned():
+    # Jeder Abruf liefert einen neuen Heartbeat: die Lücke ist nur unser Abrufabstand
+    cadence = make_cadence()
+    for fetch in range(10):
+        now = fetch * 300.0
+        assert cadence.observe(now - 1, now)
+    assert cadence.cadence is None
+    assert cadence.next_fetch() == 2700.0 + BASE
+
+
+def test_bracketed_gaps_are_learned():
+    cadence = make_cadence()
+    cadence.observe(0.0, 1.0)
+    for sample in (600.0, 1200.0):
+        # Abruf nach der Hälfte der Lücke liefert noch den alten Heartbeat
+        assert not cadence.observe(sample - 600.0, sample - 200.0)
+        assert cadence.observe(sample, sample + 1.0)
+    assert cadence.cadence == 600.0
+
+
+def test_probe_then_grace_after_expected_heartbeat():
+    cadence = make_cadence()
+    cadence.observe(0.0, 1.0)
+    for sample in (600.0, 1200.0):
+        cadence.observe(sample - 600.0, sample - 200.0)
+        cadence.observe(sample, sample + 1.0)
+
+    assert cadence.next_fetch() == 1200.0 + 600.0 * cadence_module.PROBE_FRACTION
+    assert not cadence.observe(1200.0, 1560.0)
+    assert cadence.next_fetch() == 1200.0 + 600.0 + GRACE
+    # Heartbeat bleibt aus: bald nachfragen statt einen ganzen Takt zu warten
+    assert not cadence.observe(1200.0, 1830.0)
+    assert cadence.next_fetch() == 1830.0 + 600.0 / 4
+
+
+def test_due_tolerance_for_early_refresh():
+    cadence = make_cadence()
+    cadence.observe(0.0, 0.0)
+    assert cadence.is_due(BASE - 1)
+    assert not cadence.is_due(BASE - TOLERANCE - 1)
+
+
+def test_earlier_heartbeat_resets_learned_cadence():
+    cadence = make_cadence()
+    cadence.observe(0.0, 1.0)
+    for sample in (600.0, 1200.0):
+        cadence.observe(sample - 600.0, sample - 200.0)
+        cadence.observe(sample, sample + 1.0)
+    # Kontrollabruf findet schon einen neuen Heartbeat nach 300 s
+    assert cadence.observe(1500.0, 1561.0)
+    assert cadence.cadence is None
+
+
+def test_fast_heartbeat_does_not_drift():
+    for period in (30, 45, 60, 90):
+        cadence, fetches, max_lag = simulate(period, hours=48)
+        assert cadence.cadence is None or cadence.cadence <= 2 * BASE
+        assert max_lag <= BASE
+        # Nie mehr Abrufe als mit dem festen Grundintervall
+        assert fetches <= 48 * 3600 / (BASE - 1) + 1
+
+
+def test_slow_heartbeat_skips_fetches():
+    for period in (300, 900):
+        cadence, fetches, max_lag = simulate(period, hours=48)
+        assert cadence.cadence == period
+        assert max_lag <= BASE
+        # Höchstens ein Kontrollabruf zusätzlich pro Heartbeat, deutlich weniger als im Grundintervall
+        assert fetches < 48 * 3600 / BASE / 2
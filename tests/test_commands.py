@@ -0,0 +1,78 @@
+"""Tests für die Befehlswarteschlange (commands.py, ohne Home Assistant)."""
+import asyncio
+
+from bench import load_integration_module
+
+commands = load_integration_module("commands")
+
+
+class FakeApi:
+    """set_state, das auf `release` wartet und jeden Aufruf mitschreibt."""
+
+    def __init__(self, result=True, block=False):
+        self.result = result
+        self.sent = []
+        self.release = asyncio.Event()
+        if not block:
+            self.release.set()
+
+    async def set_state(self, imei, mode, runtime=30):
+        self.sent.append((imei, mode, runtime))
+        await self.release.wait()
+        return self.result
+
+
+def test_last_writer_wins_and_all_callers_get_its_result():
+    async def run():
+        api = FakeApi()
+        queue = commands.CommandQueue(api, debounce=0.01)
+        results = await asyncio.gather(
+            queue.async_set_state("1", "HEATING", 30),
+            queue.async_set_state("1", "VENTILATION", 20),
+            queue.async_set_state("1", "OFF"),
+        )
+        assert api.sent == [("1", "OFF", 30)]
+        assert results == [True, True, True]
+
+    asyncio.run(run())
+
+
+def test_commands_for_different_vehicles_are_sent_separately():
+    async def run():
+        api = FakeApi()
+        queue = commands.CommandQueue(api, debounce=0.01)
+        results = await queue.async_set_state_bulk({"1": ("HEATING", 30), "2": ("OFF", 30)})
+        assert sorted(api.sent) == [("1", "HEATING", 30), ("2", "OFF", 30)]
+        assert results == {"1": True, "2": True}
+
+    asyncio.run(run())
+
+
+def test_shutdown_resolves_in_flight_and_pending_callers():
+    async def run():
+        api = FakeApi(block=True)
+        queue = commands.CommandQueue(api, debounce=0.01)
+        in_flight = asyncio.ensure_future(queue.async_set_state("1", "HEATING"))
+        while not api.sent:
+            await asyncio.sleep(0.01)
+        # Kommt während des laufenden PUT: wartet in _pending auf den nächsten Durchlauf
+        pending = asyncio.ensure_future(queue.async_set_state("1", "OFF"))
+        await asyncio.sleep(0)
+
+        await queue.async_shutdown()
+        # Nach async_shutdown sind alle Aufrufer beantwortet, ohne weiteres Warten
+        assert in_flight.done() and pending.done()
+        assert in_flight.result() is False
+        assert pending.result() is False
+        assert api.sent == [("1", "HEATING", 30)]
+
+    asyncio.run(run())
+
+
+def test_failed_command_reports_false():
+    async def run():
+        api = FakeApi(result=False)
+        queue = commands.CommandQueue(api, debounce=0.01)
+        assert await queue.async_set_state("1", "HEATING") is False
+
+    asyncio.run(run())
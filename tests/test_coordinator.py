@@ -0,0 +1,96 @@
+"""Tests für den /calls Coordinator (braucht Home Assistant)."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.eberspaecher.const import (  # noqa: E402
+    POLL_INTERVAL_ACTIVE_SECONDS,
+    POLL_INTERVAL_IDLE_SECONDS,
+)
+from custom_components.eberspaecher.coordinator import EberspaecherCoordinator  # noqa: E402
+from custom_components.eberspaecher.models import Vehicle  # noqa: E402
+
+IMEI = "860000000000000"
+
+
+def device(state="OFF", remaining=None):
+    return {
+        "imei": IMEI,
+        "name": "Fahrzeug 1",
+        "heaters": [{
+            "heaterState": state,
+            "lastMeasuredTemperature": {"temperature": 20.0},
+            "currentOperation": None if remaining is None else {
+                "operationMode": state, "runtime": 30, "remainingRuntime": remaining,
+            },
+        }],
+    }
+
+
+class FakeApi:
+    def __init__(self, devices):
+        self.devices = devices
+        self.calls = 0
+
+    async def get_devices(self, full=True):
+        self.calls += 1
+        return self.devices
+
+
+def next_refresh_in(hass, coordinator):
+    """Sekunden bis zum geplanten nächsten Poll."""
+    return coordinator._unsub_refresh.__self__.when() - hass.loop.time()
+
+
+def test_confirmed_start_brings_next_poll_forward(tmp_path):
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = EberspaecherCoordinator(hass, FakeApi([device()]))
+        unsub = coordinator.async_add_listener(lambda: None)
+        try:
+            await coordinator.async_refresh()
+            assert coordinator.update_interval.total_seconds() == POLL_INTERVAL_IDLE_SECONDS
+            assert next_refresh_in(hass, coordinator) > POLL_INTERVAL_ACTIVE_SECONDS + 1
+
+            # Bestätigung nach dem Einschalten: Heizung läuft, also schnell pollen
+            coordinator._async_set_vehicle(Vehicle.from_json(device("HEATING", 30)))
+            assert coordinator.update_interval.total_seconds() == POLL_INTERVAL_ACTIVE_SECONDS
+            assert next_refresh_in(hass, coordinator) <= POLL_INTERVAL_ACTIVE_SECONDS + 1
+
+            # Wieder aus: längeres Intervall, der laufende Timer bleibt
+            scheduled = coordinator._unsub_refresh
+            coordinator._async_set_vehicle(Vehicle.from_json(device()))
+            assert coordinator._unsub_refresh is scheduled
+        finally:
+            unsub()
+            await coordinator.async_shutdown()
+            await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_failed_live_refresh_ends_restored_state(tmp_path):
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = EberspaecherCoordinator(hass, FakeApi([]))
+        updates = []
+        unsub = coordinator.async_add_listener(lambda: updates.append(coordinator.restored))
+        try:
+            coordinator.async_restore({IMEI: Vehicle.from_json(device())})
+            assert coordinator.restored
+
+            # Schnellstart, aber die Cloud liefert nichts: Entitäten werden unavailable
+            await coordinator.async_refresh()
+            assert not coordinator.last_update_success
+            assert not coordinator.restored
+            assert updates == [False]
+        finally:
+            unsub()
+            await coordinator.async_shutdown()
+            await hass.async_stop(force=True)
+
+    asyncio.run(run())
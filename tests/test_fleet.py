@@ -0,0 +1,102 @@
+"""Tests für die Flotten-Kennzahlen (fleet.py, ohne Home Assistant), gegen Brute Force geprüft."""
+import random
+from datetime import datetime, timezone
+
+from bench import load_integration_module
+
+fleet = load_integration_module("fleet")
+models = load_integration_module("models")
+
+NOW = 1_700_000_000
+MAX_AGE = 900
+
+
+def check_index(index, values):
+    expected = sorted((value, imei) for imei, value in values.items() if value is not None)
+    assert index._items == expected
+    assert len(index) == len(expected)
+    assert index.first() == (expected[0] if expected else None)
+    for probe in {value for value, _ in expected} | {0, 10**9}:
+        assert index.count_below(probe) == sum(1 for value, _ in expected if value < probe)
+
+
+def test_sorted_index_matches_brute_force():
+    rng = random.Random(1)
+    index = fleet._SortedIndex()
+    values = {}
+    for _ in range(2000):
+        imei = f"imei{rng.randrange(30)}"
+        action = rng.random()
+        if action < 0.15:
+            index.discard(imei)
+            values.pop(imei, None)
+        else:
+            # Wenige verschiedene Werte: viele Fahrzeuge teilen sich einen Wert
+            value = None if action < 0.2 else rng.choice((11.9, 12.1, 12.4, 12.6))
+            index.set(imei, value)
+            values[imei] = value
+        check_index(index, values)
+
+
+def test_shared_value_survives_removing_one_vehicle():
+    index = fleet._SortedIndex()
+    for imei in ("a", "b", "c"):
+        index.set(imei, 12.0)
+    index.set("d", 12.5)
+    index.discard("a")
+    assert index.first() == (12.0, "b")
+    index.set("b", 13.0)
+    assert index.first() == (12.0, "c")
+    assert index.count_below(12.5) == 1
+
+
+def vehicle(imei, state):
+    return models.Vehicle.from_json({"imei": imei, "name": imei, "heaters": [{"heaterState": state}]})
+
+
+def heartbeat(millivolts, age):
+    timestamp = datetime.fromtimestamp(NOW - age, timezone.utc).isoformat() if age is not None else None
+    return models.Heartbeat(voltage=millivolts, rssi=None, timestamp=timestamp)
+
+
+def test_fleet_aggregates_match_brute_force():
+    rng = random.Random(2)
+    aggregates = fleet.FleetAggregates()
+    vehicles, heartbeats = {}, {}
+    for _ in range(500):
+        imei = f"imei{rng.randrange(20)}"
+        action = rng.random()
+        if action < 0.1:
+            vehicles.pop(imei, None)
+            heartbeats.pop(imei, None)
+            aggregates.update_vehicles(vehicles, [imei])
+            aggregates.update_heartbeats(heartbeats, [imei])
+        elif action < 0.5:
+            vehicles[imei] = vehicle(imei, rng.choice(("OFF", "HEATING", "VENTILATION")))
+            # Wie _update_fleet: neue Fahrzeuge bekommen gleich ihren Heartbeat
+            added = aggregates.update_vehicles(vehicles, [imei])
+            aggregates.update_heartbeats(heartbeats, added)
+        else:
+            heartbeats[imei] = heartbeat(
+                rng.choice((None, 11900, 12100, 12400)), rng.choice((None, 60, 600, 3600)),
+            )
+            aggregates.update_heartbeats(heartbeats, [imei])
+
+        known = {imei: beat for imei, beat in heartbeats.items() if imei in vehicles}
+        assert aggregates.active_count == sum(v.is_active for v in vehicles.values())
+
+        volts = sorted(
+            (beat.voltage_volts, imei) for imei, beat in known.items() if beat.voltage_volts is not None
+        )
+        lowest = aggregates.lowest_voltage
+        if volts:
+            assert lowest == (volts[0][0], vehicles[volts[0][1]])
+        else:
+            assert lowest is None
+
+        stale = sum(
+            1 for imei in vehicles
+            if imei not in known or known[imei].time is None
+            or known[imei].time.timestamp() < NOW - MAX_AGE
+        )
+        assert aggregates.stale_count(NOW, MAX_AGE) == stale
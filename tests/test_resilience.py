@@ -0,0 +1,128 @@
+"""Tests für den Circuit Breaker (resilience.py und api._request, ohne Home Assistant)."""
+import asyncio
+
+import pytest
+
+from bench import load_integration_module
+
+resilience = load_integration_module("resilience")
+api_module = load_integration_module("api")
+
+THRESHOLD = 3
+RESET = 60
+
+
+class FakeClock:
+    """Ersetzt `time` im resilience-Modul; die Zeit läuft nur über advance()."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+def make_breaker():
+    return resilience.CircuitBreaker(THRESHOLD, RESET)
+
+
+def test_breaker_opens_at_threshold(clock):
+    breaker = make_breaker()
+    for _ in range(THRESHOLD - 1):
+        breaker.record_failure()
+        assert breaker.state == breaker.CLOSED
+        assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = make_breaker()
+    for _ in range(THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == breaker.CLOSED
+
+
+def test_half_open_admits_exactly_one_probe(clock):
+    breaker = make_breaker()
+    for _ in range(THRESHOLD):
+        breaker.record_failure()
+    clock.advance(RESET)
+    assert breaker.state == breaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # Fehlgeschlagene Probe öffnet sofort wieder, erfolgreiche schließt
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+    clock.advance(RESET)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def make_api(send_once):
+    api = api_module.EberspaecherAPI(
+        "test@example.com", "test", session=None, token="token",
+        limiter=resilience.TokenBucket(1000, 1000),
+    )
+    api._send_once = send_once
+    # Breaker steht auf half-open: der nächste Request ist die Probe
+    for _ in range(api_module.BREAKER_THRESHOLD):
+        api._breaker.record_failure()
+    return api
+
+
+def test_probe_released_when_request_raises(clock):
+    async def send_once(endpoint, method, url, **kwargs):
+        raise ValueError("keine JSON-Antwort")
+
+    async def run():
+        api = make_api(send_once)
+        clock.advance(api_module.BREAKER_RESET_SECONDS)
+        with pytest.raises(ValueError):
+            await api._request("calls", "GET", "http://cloud/calls")
+        # Fehlgeschlagene Probe: wieder offen, nach der Wartezeit die nächste Probe
+        assert api.circuit_state == resilience.CircuitBreaker.OPEN
+        clock.advance(api_module.BREAKER_RESET_SECONDS)
+        assert api._breaker.allow_request()
+
+    asyncio.run(run())
+
+
+def test_probe_released_when_request_cancelled(clock):
+    started = asyncio.Event()
+
+    async def send_once(endpoint, method, url, **kwargs):
+        started.set()
+        await asyncio.sleep(3600)
+
+    async def run():
+        api = make_api(send_once)
+        clock.advance(api_module.BREAKER_RESET_SECONDS)
+        task = asyncio.ensure_future(api._request("calls", "GET", "http://cloud/calls"))
+        await started.wait()
+        assert not api._breaker.allow_request()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Abbruch ist kein Ergebnis: weiter half-open, die nächste Probe darf sofort
+        assert api.circuit_state == resilience.CircuitBreaker.HALF_OPEN
+        assert api._breaker.allow_request()
+
+    asyncio.run(run())
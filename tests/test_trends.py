@@ -0,0 +1,53 @@
+"""Tests für die Trends pro Fahrzeug (trends.py, ohne Home Assistant)."""
+from bench import load_integration_module
+
+trends_module = load_integration_module("trends")
+models = load_integration_module("models")
+
+CAPACITY = 16
+
+
+def heater(temperature):
+    return models.Heater.from_json({
+        "heaterState": "OFF", "lastMeasuredTemperature": {"temperature": temperature},
+    })
+
+
+def test_repeated_snapshot_adds_one_temperature_sample():
+    trends = trends_module.VehicleTrends(CAPACITY)
+    snapshot = heater(20.0)
+    # Bestätigungen anderer Fahrzeuge melden denselben Snapshot erneut
+    assert trends.add_temperature(0, snapshot)
+    for second in range(1, 5):
+        assert not trends.add_temperature(second, snapshot)
+    assert len(trends.temperature) == 1
+
+    # Ein neuer Abruf liefert ein neues Objekt, auch bei gleicher Temperatur
+    assert trends.add_temperature(60, heater(20.0))
+    assert len(trends.temperature) == 2
+
+
+def test_heater_without_temperature_adds_nothing():
+    trends = trends_module.VehicleTrends(CAPACITY)
+    assert not trends.add_temperature(0, None)
+    assert not trends.add_temperature(0, heater(None))
+    assert len(trends.temperature) == 0
+
+
+def test_same_heartbeat_adds_one_voltage_sample():
+    trends = trends_module.VehicleTrends(CAPACITY)
+    assert trends.add_voltage(0, 12.6, "2024-01-01T00:00:00Z")
+    for second in range(1, 5):
+        assert not trends.add_voltage(second, 12.6, "2024-01-01T00:00:00Z")
+    assert trends.add_voltage(300, 12.5, "2024-01-01T00:05:00Z")
+    assert len(trends.voltage) == 2
+
+
+def test_hours_until_low_voltage():
+    trends = trends_module.VehicleTrends(CAPACITY)
+    for hour in range(4):
+        trends.add_voltage(hour * 3600, 12.6 - 0.1 * hour, hour)
+    # 12.3 V, fällt 0.1 V/h: 5 Stunden bis 11.8 V
+    assert abs(trends.hours_until(11.8, 4, 0.02) - 5.0) < 1e-9
+    assert trends.hours_until(11.8, 5, 0.02) is None
+    assert trends.hours_until(11.8, 4, 0.2) is None